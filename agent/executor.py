@@ -6,6 +6,14 @@ from agent.object_memory_manager import ObjectMemoryManager
 
 object_store = ObjectMemoryManager()  # 可改为外部注入
 
+# 合并分割步骤的批大小：默认 1（逐张推理），可用环境变量覆盖；实际值还会按可用内存封顶
+SEGMENT_BATCH_ENV = "CRACK_SEGMENT_BATCH_SIZE"
+# 896×896 输入下每多一张图像的峰值内存增量（CPU 实测约 1.7 GB），用于按可用内存封顶批大小
+SEGMENT_IMAGE_BYTES = int(1.8 * 1024 ** 3)
+
+# 连续 segment_crack_image 步骤中，这些参数相同时可合并为一次批量推理
+MERGEABLE_SEGMENT_ARGS = {"checkpoint_path", "backend", "use_cache", "save_prob", "prob_format"}
+
 def patch_image_paths(plan: list, base_folder: str = "data") -> list:
     for step in plan:
         args = step.get("args", {})
@@ -16,10 +24,179 @@ def patch_image_paths(plan: list, base_folder: str = "data") -> list:
                     args[key] = os.path.join(base_folder, path)
     return plan
 
-def execute_plan(plan: List[Dict[str, Any]], memory=None) -> List[Dict[str, Any]]:
-    results = []
+
+def _available_memory_bytes() -> int | None:
+    """可用内存：优先 psutil，其次 cgroup v2 限额余量与 /proc/meminfo 的较小值；都取不到时返回 None。"""
+    try:
+        import psutil
+        return int(psutil.virtual_memory().available)
+    except ImportError:
+        pass
+
+    candidates = []
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            with open("/sys/fs/cgroup/memory.current") as f:
+                candidates.append(int(limit) - int(f.read().strip()))
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    candidates.append(int(line.split()[1]) * 1024)
+                    break
+    except (OSError, ValueError):
+        pass
+    return min(candidates) if candidates else None
+
+
+def resolve_segment_batch_size(requested: int | None = None) -> int:
+    """
+    合并分割的批大小：requested 为空时读取环境变量 CRACK_SEGMENT_BATCH_SIZE（默认 1），
+    再按可用内存 / SEGMENT_IMAGE_BYTES 封顶，至少为 1。
+    """
+    if requested is None:
+        requested = int(os.getenv(SEGMENT_BATCH_ENV, "1"))
+    requested = max(int(requested), 1)
+    available = _available_memory_bytes()
+    if available is None:
+        return requested
+    capped = max(min(requested, available // SEGMENT_IMAGE_BYTES), 1)
+    if capped < requested:
+        print(f"⚠️ 可用内存约 {available / 1024 ** 3:.1f} GB，分割批大小由 {requested} 降为 {capped}")
+    return capped
+
+
+def _update_object_store(tool_name: str, args: dict, result: dict):
+    if tool_name == "segment_crack_image" and result.get("status") == "success":
+        image_path = args.get("image_path", "")
+        object_id = object_store.find_id_by_image_path(image_path)
+        mask_path = result["outputs"].get("mask_path")
+        if object_id and mask_path:
+            object_store.update(object_id, "segmentation_path", mask_path)
+            object_store.add_status(object_id, "segmented")
+
+    elif tool_name in {"quantify_crack_metrics", "quantify_crack_geometry"} and result.get("status") == "success":
+        mask_path = args.get("mask_path", "")
+        object_id = object_store.find_id_by_mask_path(mask_path)
+        if object_id:
+            object_store.add_status(object_id, "quantified")
+
+    elif tool_name == "generate_crack_visuals" and result.get("status") == "success":
+        mask_path = args.get("mask_path", "")
+        object_id = object_store.find_id_by_mask_path(mask_path)
+        vis_path = result.get("visualizations", {}).get("max_width_overlay")
+        if object_id:
+            if vis_path:
+                object_store.update(object_id, "visualization_path", vis_path)
+            object_store.add_status(object_id, "generated")
+
+
+def merge_segment_steps(plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将连续的 segment_crack_image 步骤（MERGEABLE_SEGMENT_ARGS 取值相同）合并为一个 segment_crack_images 批量步骤，
+    原步骤保存在 merged_steps 中，执行后再展开为逐图结果。
+    """
+    merged = []
+    run = []
+
+    def group_key(args):
+        return tuple(args.get(k) for k in sorted(MERGEABLE_SEGMENT_ARGS))
+
+    def flush():
+        if len(run) == 1:
+            merged.append(run[0])
+        elif run:
+            args = {"image_paths": [s["args"]["image_path"] for s in run]}
+            for k in MERGEABLE_SEGMENT_ARGS:
+                if k in run[0]["args"]:
+                    args[k] = run[0]["args"][k]
+            merged.append({
+                "tool": "segment_crack_images",
+                "args": args,
+                "merged_steps": list(run)
+            })
+        run.clear()
 
     for step in plan:
+        args = step.get("args", {})
+        if step.get("tool") == "segment_crack_image" and "image_path" in args \
+                and set(args) <= MERGEABLE_SEGMENT_ARGS | {"image_path"}:
+            if run and group_key(run[0]["args"]) != group_key(args):
+                flush()
+            run.append(step)
+        else:
+            flush()
+            merged.append(step)
+    flush()
+    return merged
+
+
+def _execute_merged_segment(step: Dict[str, Any], batch_size: int, num_workers: int = 0) -> List[Dict[str, Any]]:
+    """
+    执行合并后的批量分割步骤，并按原顺序展开为逐图的 segment_crack_image 结果。
+    num_workers > 1 时改用多进程分片分割（不支持 save_prob，此时仍走单进程批量推理）。
+    """
+    args = dict(step["args"], batch_size=batch_size)
+    tool_name = "segment_crack_images"
+    if num_workers > 1 and not args.get("save_prob"):
+        tool_name = "segment_crack_images_parallel"
+        args["num_workers"] = num_workers
+        args.pop("save_prob", None)
+        args.pop("prob_format", None)
+    sub_steps = step["merged_steps"]
+    try:
+        batch_result = tool_registry[tool_name](**args)
+        per_image = (batch_result.get("outputs") or {}).get("results") or [None] * len(sub_steps)
+        batch_error = batch_result.get("error")
+    except Exception:
+        traceback.print_exc()
+        per_image = [None] * len(sub_steps)
+        batch_error = traceback.format_exc()
+
+    results = []
+    for sub, item in zip(sub_steps, per_image):
+        if item is None:
+            item = {"status": "error", "mask_path": None, "error": batch_error}
+        ok = item["status"] == "success"
+        result = {
+            "status": item["status"],
+            "summary": "裂缝分割完成，掩膜图像已保存（批量推理）" if ok else "分割失败",
+            "outputs": {k: v for k, v in item.items() if k in {"mask_path", "prob_path"}} if ok else None,
+            "error": item["error"],
+        }
+        _update_object_store("segment_crack_image", sub["args"], result)
+        results.append({
+            "tool": "segment_crack_image",
+            "status": result["status"],
+            "summary": result["summary"],
+            "outputs": result["outputs"],
+            "visualizations": None,
+            "error": result["error"],
+            "args": sub["args"],
+            "subject": sub.get("subject", "")
+        })
+    return results
+
+
+def execute_plan(
+    plan: List[Dict[str, Any]],
+    memory=None,
+    segment_batch_size: int | None = None,
+    segment_workers: int = 0
+) -> List[Dict[str, Any]]:
+    """segment_batch_size 为空时取 CRACK_SEGMENT_BATCH_SIZE（默认 1）；任何取值都按可用内存封顶。"""
+    results = []
+
+    for step in merge_segment_steps(plan):
+        if "merged_steps" in step:
+            batch_size = resolve_segment_batch_size(segment_batch_size)
+            results.extend(_execute_merged_segment(step, batch_size, segment_workers))
+            continue
+
         tool_name = step.get("tool")
         args = step.get("args", {})
         subject = step.get("subject", "")  # ✅ 提前获取 subject
@@ -48,30 +225,9 @@ def execute_plan(plan: List[Dict[str, Any]], memory=None) -> List[Dict[str, Any]
             result = tool_fn(**args)
 
             # ✅ 更新 object memory（原逻辑保留）
-            if tool_name == "segment_crack_image" and result.get("status") == "success":
-                image_path = args.get("image_path", "")
-                object_id = object_store.find_id_by_image_path(image_path)
-                mask_path = result["outputs"].get("mask_path")
-                if object_id and mask_path:
-                    object_store.update(object_id, "segmentation_path", mask_path)
-                    object_store.add_status(object_id, "segmented")
-
-            elif tool_name in {"quantify_crack_metrics", "quantify_crack_geometry"} and result.get("status") == "success":
-                mask_path = args.get("mask_path", "")
-                object_id = object_store.find_id_by_mask_path(mask_path)
-                if object_id:
-                    object_store.add_status(object_id, "quantified")
-
-            elif tool_name == "generate_crack_visuals" and result.get("status") == "success":
-                mask_path = args.get("mask_path", "")
-                object_id = object_store.find_id_by_mask_path(mask_path)
-                vis_path = result.get("visualizations", {}).get("max_width_overlay")
-                if object_id:
-                    if vis_path:
-                        object_store.update(object_id, "visualization_path", vis_path)
-                    object_store.add_status(object_id, "generated")
+            _update_object_store(tool_name, args, result)
 
-            results.append({
+            entry = {
                 "tool": tool_name,
                 "status": result.get("status", "unknown"),
                 "summary": result.get("summary", ""),
@@ -80,7 +236,11 @@ def execute_plan(plan: List[Dict[str, Any]], memory=None) -> List[Dict[str, Any]
                 "error": result.get("error", None),
                 "args": args,
                 "subject": subject  # ✅ 加入 subject 字段（确保 memory 使用）
-            })
+            }
+            if result.get("cache"):
+                # 内部缓存数据（如像素指标与掩膜哈希），只给 memory 使用
+                entry["cache"] = result["cache"]
+            results.append(entry)
 
         except Exception as e:
             print(f"[❌ ERROR] 工具 {tool_name} 执行时出错: {e}")
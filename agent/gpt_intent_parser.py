@@ -14,8 +14,8 @@ SYSTEM_PROMPT = (
     "- action: 必选，取值为以下之一：segment / quantify / visualize / compare / chat / generate\n"
     "- target_indices: 必选，数组，如 [0] 表示第一张图像，支持 'all'\n"
     "- pixel_size_mm: 可选，仅在 quantify 和 generate 中使用，单位为毫米\n"
-    "- metrics: 可选，仅 quantify 使用，值为以下之一：max_width, avg_width, length, area\n"
-    "- visual_types: 可选，仅当用户请求生成图像时使用，可选值包括：original, mask, overlay, max_width, skeleton, normals\n"
+    "- metrics: 可选，仅 quantify 使用，值为以下之一：max_width, avg_width, length, area, geometric_length, branch_count, width_p50, width_p90, width_p99, width_profile_max\n"
+    "- visual_types: 可选，仅当用户请求生成图像时使用，可选值包括：original, mask, overlay, max_width, skeleton, normals, branches\n"
     "\n"
     "🎯 编排策略：\n"
     "1. 如果用户提到“计算、量化、测量、how long、how wide、how big”等，理解为需要计算几何指标，action 为 quantify，填写 metrics。\n"
@@ -67,14 +67,14 @@ FUNCTION_SCHEMA = [
                                 "type": "array",
                                 "items": {
                                     "type": "string",
-                                    "enum": ["max_width", "avg_width", "length", "area"]
+                                    "enum": ["max_width", "avg_width", "length", "area", "geometric_length", "branch_count", "width_p50", "width_p90", "width_p99", "width_profile_max"]
                                 }
                             },
                             "visual_types": {
                                 "type": "array",
                                 "items": {
                                     "type": "string",
-                                    "enum": ["original", "mask", "overlay", "max_width", "skeleton", "normals"]
+                                    "enum": ["original", "mask", "overlay", "max_width", "skeleton", "normals", "branches"]
                                 }
                             }
                         },
@@ -5,6 +5,8 @@ from pathlib import Path
 from datetime import datetime
 from datetime import datetime, timezone
 
+from crack_metrics.metric_table import pixel_to_mm
+
 datetime.now(timezone.utc).isoformat()
 
 
@@ -13,6 +15,8 @@ class MemoryController:
     def __init__(self, filepath: str = "memory_store.jsonl"):
         self.filepath = Path(filepath)
         self.records: List[Dict[str, Any]] = []
+        # 掩膜内容哈希 → 像素单位指标（与 pixel_size_mm 无关，读取时再换算为毫米）
+        self.pixel_cache: Dict[str, Dict[str, Any]] = {}
         self.alias_map = {
             "最大宽度": "max_width",
             "平均宽度": "avg_width",
@@ -31,9 +35,16 @@ class MemoryController:
                 try:
                     obj = json.loads(line.strip())
                     self.records.append(obj)
+                    self._index_pixel_record(obj)
                 except Exception:
                     continue
 
+    def _index_pixel_record(self, record: Dict):
+        if record.get("context", {}).get("task") == "pixel_metrics":
+            mask_hash = record["context"].get("mask_hash")
+            if mask_hash:
+                self.pixel_cache.setdefault(mask_hash, {}).update(record.get("observation", {}))
+
     def _save_record(self, record: Dict):
         with open(self.filepath, "a", encoding="utf-8") as f:
             f.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -72,7 +83,11 @@ class MemoryController:
             
             elif tool in {"quantify_crack_geometry", "quantify_crack_metrics"}:
                 pixel_size = args.get("pixel_size_mm", 0.5)
-                outputs = r.get("outputs", {})
+                outputs = r.get("outputs") or {}
+                cache = r.get("cache") or {}
+                pixel_metrics, mask_hash = cache.get("pixel_metrics"), cache.get("mask_hash")
+                if pixel_metrics and mask_hash:
+                    self.save_pixel_metrics(subject, mask_hash, pixel_metrics)
                 visuals = r.get("visualizations", {})
 
                 if outputs and not visuals:
@@ -171,7 +186,42 @@ class MemoryController:
         self.records.append(record)
         self._save_record(record)
 
-    def get_metrics_by_name(self, name: str, pixel_size: float = None) -> Dict[str, Any]:
+    def save_pixel_metrics(self, subject_name: str, mask_hash: str, pixel_metrics: Dict[str, Any]):
+        """
+        按掩膜内容哈希保存像素单位指标（length_px / area_px / 宽度统计等）。
+        同一掩膜换用任意 pixel_size_mm 时只需换算，无需重新骨架化；已有相同值时不重复写入。
+        """
+        cached = self.pixel_cache.get(mask_hash, {})
+        if all(k in cached and cached[k] == v for k, v in pixel_metrics.items()):
+            return
+        record = {
+            "subject": subject_name,
+            "context": {
+                "task": "pixel_metrics",
+                "mask_hash": mask_hash,
+                "timestamp": datetime.utcnow().isoformat()
+            },
+            "observation": pixel_metrics
+        }
+        self.records.append(record)
+        self._index_pixel_record(record)
+        self._save_record(record)
+
+    def get_pixel_metrics(self, mask_hash: str) -> Dict[str, Any]:
+        return self.pixel_cache.get(mask_hash, {})
+
+    def derive_metrics(self, mask_hash: str, pixel_size: float) -> Dict[str, Any]:
+        """由缓存的像素值换算出毫米单位指标（键与 quantify_crack_metrics 的输出一致）；未缓存时返回 {}。"""
+        pixel_metrics = self.get_pixel_metrics(mask_hash)
+        if not pixel_metrics:
+            return {}
+        return pixel_to_mm(pixel_metrics, pixel_size)[1]
+
+    def get_metrics_by_name(self, name: str, pixel_size: float = None, mask_hash: str = None) -> Dict[str, Any]:
+        """
+        最近一次 quantify 记录的指标（pixel_size 给定时只取同一像素尺寸）；
+        同时给出 mask_hash 时，由像素缓存换算出的指标覆盖在该记录之上（缓存只含部分指标时其余仍取自记录）。
+        """
         matches = [
             r for r in self.records
             if r.get("subject") == name
@@ -182,10 +232,11 @@ class MemoryController:
                 r for r in matches
                 if abs(r["context"].get("pixel_size_mm", 0) - pixel_size) < 1e-6
             ]
-        print(f"[DEBUG] matches count: {len(matches)} → {[r.get('context', {}).get('task') for r in matches]}")
-        if not matches:
-            return {}
-        return matches[-1].get("observation", {})
+        metrics = dict(matches[-1].get("observation", {})) if matches else {}
+
+        if mask_hash and pixel_size is not None:
+            metrics.update(self.derive_metrics(mask_hash, pixel_size))
+        return metrics
 
     def get_mask_path(self, name: str) -> str:
         for r in reversed(self.records):
@@ -210,9 +261,9 @@ class MemoryController:
         latest = self.records[-count:]
         return {r["subject"]: r["observation"] for r in latest if "observation" in r}
 
-    def has_metrics(self, name: str, requested_metrics: List[str], pixel_size: float = None) -> bool:
+    def has_metrics(self, name: str, requested_metrics: List[str], pixel_size: float = None, mask_hash: str = None) -> bool:
         
-        existing = self.get_metrics_by_name(name, pixel_size)
+        existing = self.get_metrics_by_name(name, pixel_size, mask_hash)
         for m in requested_metrics:
             found = False
             norm_m = self.normalize(self.to_standard_metric(m))
@@ -237,6 +288,7 @@ class MemoryController:
 
     def clear(self):
         self.records = []
+        self.pixel_cache = {}
         if self.filepath.exists():
             self.filepath.unlink()
 
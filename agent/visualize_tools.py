@@ -46,7 +46,7 @@ def visualize_crack_result(
     # ✅ skeleton / max_width fallback 自动生成
     fallback_visuals = []
     for vt in visual_types:
-        if vt in {"skeleton", "max_width", "normals"}:
+        if vt in {"skeleton", "max_width", "normals", "branches"}:
             cached = memory.get_visualization_path(subject_name, vt)
             if cached and os.path.exists(cached):
                 vis_paths[vt] = cached
@@ -0,0 +1,105 @@
+"""
+游程掩膜（crack_metrics.compact_mask）与 PNG 掩膜对比：每张掩膜的内存 / 文件体积，
+加载耗时（PNG 解码 + 二值化 vs 游程加载 + ROI 展开），面积计算耗时，以及往返是否无损。
+
+示例：
+    python -m benchmarks.bench_compact_mask --mask-dir data/Test_images_GT --synthetic-sizes 4096 8192
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+from crack_metrics.binarize import binarize
+from crack_metrics.compact_mask import RunLengthMask
+from utils.path_utils import list_image_paths
+from benchmarks.synthetic import synthetic_crack
+
+
+def _best_of(fn, repeats: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def bench_mask(name: str, binary: np.ndarray, workdir: str, repeats: int) -> dict:
+    png_path = os.path.join(workdir, f"{name}.png")
+    rle_path = os.path.join(workdir, f"{name}.rle.npz")
+    cv2.imwrite(png_path, binary * 255)
+    rle = RunLengthMask.from_png(png_path)
+    rle.save(rle_path)
+
+    png_s, dense = _best_of(lambda: binarize(cv2.imread(png_path, cv2.IMREAD_GRAYSCALE)), repeats)
+    rle_load_s, loaded = _best_of(lambda: RunLengthMask.load(rle_path), repeats)
+    roi_s, (roi, _) = _best_of(lambda: RunLengthMask.load(rle_path).roi(), repeats)
+    dense_area_s, _ = _best_of(lambda: int(np.count_nonzero(dense)), repeats)
+    rle_area_s, _ = _best_of(lambda: loaded.area_px, repeats)
+
+    return {
+        "mask": name,
+        "shape": list(binary.shape),
+        "foreground_ratio": round(float(binary.mean()), 4),
+        "runs": rle.run_count,
+        "dense_bytes": binary.size,
+        "roi_bytes": roi.size,
+        "rle_bytes": rle.nbytes,
+        "memory_ratio": round(binary.size / max(rle.nbytes, 1), 1),
+        "png_file_bytes": os.path.getsize(png_path),
+        "rle_file_bytes": os.path.getsize(rle_path),
+        "png_load_ms": round(png_s * 1000, 3),
+        "rle_load_ms": round(rle_load_s * 1000, 3),
+        "rle_load_roi_ms": round(roi_s * 1000, 3),
+        "load_speedup": round(png_s / roi_s, 1) if roi_s > 0 else None,
+        "dense_area_ms": round(dense_area_s * 1000, 3),
+        "rle_area_ms": round(rle_area_s * 1000, 3),
+        "lossless": bool(np.array_equal(loaded.to_binary(), dense))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="游程掩膜 vs PNG：体积与加载耗时")
+    parser.add_argument("--mask-dir", default="data/Test_images_GT")
+    parser.add_argument("--synthetic-sizes", type=int, nargs="*", default=[4096, 8192])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default="outputs/bench/compact_mask.json")
+    args = parser.parse_args()
+
+    masks = []
+    if args.mask_dir and os.path.isdir(args.mask_dir):
+        for path in list_image_paths(args.mask_dir):
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                masks.append((os.path.splitext(os.path.basename(path))[0], binarize(image)))
+    for size in args.synthetic_sizes:
+        masks.append((f"synthetic_{size}", synthetic_crack(size, length=size * 2, width=8, branches=3, noise=0.2)[0]))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, binary in masks:
+            row = bench_mask(name, binary, workdir, args.repeats)
+            print(json.dumps(row, ensure_ascii=False))
+            rows.append(row)
+
+    summary = {
+        "masks": len(rows),
+        "mean_memory_ratio": round(float(np.mean([r["memory_ratio"] for r in rows])), 1) if rows else None,
+        "mean_load_speedup": round(float(np.mean([r["load_speedup"] for r in rows])), 1) if rows else None,
+        "all_lossless": all(r["lossless"] for r in rows)
+    }
+    print(json.dumps(summary, ensure_ascii=False))
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "masks": rows}, f, ensure_ascii=False, indent=2)
+    print(f"✅ 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+crack_metrics 微基准 + 精度参照：在合成裂缝（benchmarks.synthetic，带解析真值）上，
+按图像尺寸 / 裂缝长度 / 线宽 / 分支数 / 边缘噪声扫描各阶段耗时：
+    binarize、extract_skeleton_and_normals、compute_max_width_px、compute_average_width_px、
+    quantify_crack_metrics（完整工具，含读图与写 CSV）
+并记录各指标相对真值的误差。给定基线时作为回归门禁：耗时或精度退化即以非零码退出。
+
+示例：
+    python -m benchmarks.bench_metrics --sizes 512 1024 2048 --widths 3 9 --branches 0 3
+    python -m benchmarks.bench_metrics --save-baseline outputs/bench/metrics_baseline.json    # 记录基线
+    python -m benchmarks.bench_metrics --baseline outputs/bench/metrics_baseline.json         # 回归检查
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import itertools
+
+import cv2
+import numpy as np
+
+from crack_metrics.binarize import binarize
+from crack_metrics.skeleton import extract_skeleton_and_normals
+from crack_metrics.width_max import compute_max_width_px
+from crack_metrics.width_avg import compute_average_width_px
+from crack_metrics.analysis import MaskAnalysis
+from task_tools.quantify import quantify_crack_metrics
+from benchmarks.synthetic import synthetic_crack
+
+CASE_KEYS = ["size", "length", "width", "branches", "noise"]
+STAGES = ["binarize", "skeleton", "max_width", "avg_width", "quantify"]
+ERROR_KEYS = ["geometric_length_err", "avg_width_err", "max_width_err"]
+
+
+def _best_of(fn, repeats: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _rel_err(value: float, truth: float) -> float:
+    return round(abs(value - truth) / truth, 4) if truth else 0.0
+
+
+def bench_case(size: int, length: float, width: int, branches: int, noise: float,
+               seed: int, repeats: int, workdir: str) -> dict:
+    """单个合成样本：各阶段最优耗时（ms）+ 指标相对真值误差。"""
+    binary, truth = synthetic_crack(size, length, width, branches, noise, seed)
+    image = binary * 255
+    mask_path = os.path.join(workdir, f"syn_{size}_{width}_{branches}_{seed}.png")
+    cv2.imwrite(mask_path, image)
+
+    timings = {
+        "binarize": _best_of(lambda: binarize(image), repeats)[0],
+        "skeleton": _best_of(lambda: extract_skeleton_and_normals(binary), repeats)[0],
+        # 以下两项不传入共享 analysis，测的是单独调用时的完整开销
+        "max_width": _best_of(lambda: compute_max_width_px(binary), repeats)[0],
+        "avg_width": _best_of(lambda: compute_average_width_px(binary), repeats)[0],
+        "quantify": _best_of(lambda: quantify_crack_metrics(mask_path, 1.0), repeats)[0],
+    }
+
+    analysis = MaskAnalysis.from_binary(binary)
+    return {
+        "size": size,
+        "length": length,
+        "width": width,
+        "branches": branches,
+        "noise": noise,
+        **{f"{k}_ms": round(v * 1000, 2) for k, v in timings.items()},
+        "truth_length_px": truth["length_px"],
+        "geometric_length_px": round(analysis.geometric_length_px, 2),
+        "geometric_length_err": _rel_err(analysis.geometric_length_px, truth["length_px"]),
+        "avg_width_err": _rel_err(analysis.avg_width_px, truth["width_px"]),
+        "max_width_err": _rel_err(analysis.max_width_px, truth["width_px"]),
+        "branch_count": analysis.graph.branch_count,
+        "truth_branch_count": truth["branch_count"]
+    }
+
+
+def compare_with_baseline(results: list, baseline: list, tolerance: float, error_tolerance: float,
+                          min_delta_ms: float = 1.0) -> list:
+    """
+    返回回归列表：
+        耗时：某阶段比基线慢 tolerance 以上（且绝对差超过 min_delta_ms，忽略计时抖动）
+        精度：某项相对误差比基线增加 error_tolerance 以上
+    """
+    def key(r):
+        return tuple(r[k] for k in CASE_KEYS)
+
+    base = {key(r): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = base.get(key(r))
+        if not b:
+            continue
+        slow = {
+            s: [b[f"{s}_ms"], r[f"{s}_ms"]] for s in STAGES
+            if r[f"{s}_ms"] > b[f"{s}_ms"] * (1 + tolerance) and r[f"{s}_ms"] - b[f"{s}_ms"] > min_delta_ms
+        }
+        worse = {e: [b[e], r[e]] for e in ERROR_KEYS if r[e] > b[e] + error_tolerance}
+        if slow or worse:
+            regressions.append({"case": dict(zip(CASE_KEYS, key(r))), "timing_ms": slow, "error": worse})
+    return regressions
+
+
+def write_results(results: list, output: str) -> str:
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="crack_metrics 微基准与精度参照")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024, 2048])
+    parser.add_argument("--length-ratios", type=float, nargs="+", default=[0.8],
+                        help="主干长度 = 比例 × 图像边长（受边距截断）")
+    parser.add_argument("--widths", type=int, nargs="+", default=[3, 9])
+    parser.add_argument("--branches", type=int, nargs="+", default=[0, 3])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.0, 0.2])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="outputs/bench/metrics.json")
+    parser.add_argument("--baseline", default=None, help="基线 JSON；给定时比较并在回归时以非零码退出")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的耗时相对退化比例")
+    parser.add_argument("--error-tolerance", type=float, default=0.02, help="允许的相对误差增量")
+    parser.add_argument("--save-baseline", default=None, help="将本次结果另存为基线 JSON")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    save_baseline = os.path.abspath(args.save_baseline) if args.save_baseline else None
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # quantify_crack_metrics 会写 outputs/csv，切到临时目录避免污染工作区
+        os.chdir(workdir)
+        try:
+            for size, ratio, width, branches, noise in itertools.product(
+                args.sizes, args.length_ratios, args.widths, args.branches, args.noise
+            ):
+                row = bench_case(size, round(size * ratio), width, branches, noise, args.seed, args.repeats, workdir)
+                print(json.dumps(row, ensure_ascii=False))
+                results.append(row)
+        finally:
+            os.chdir(cwd)
+
+    print(f"✅ 结果已保存: {write_results(results, output)}")
+    if save_baseline:
+        write_results(results, save_baseline)
+        print(f"📌 基线已更新: {save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance, args.error_tolerance)
+        if regressions:
+            print(json.dumps({"regressions": regressions}, ensure_ascii=False, indent=2))
+            raise SystemExit(f"❌ 发现 {len(regressions)} 项回归（耗时容差 {args.tolerance:.0%}，"
+                             f"误差容差 {args.error_tolerance}）")
+        print("✅ 与基线相比无回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+分块（out-of-core）量化与整图内存计算的一致性检查：
+    单块（tile_size 覆盖整图）且 halo=0 时，各指标必须与 MaskAnalysis 完全相同，否则以非零码退出；
+    多块时记录各指标与整图的差异及耗时。
+
+示例：
+    python -m benchmarks.bench_out_of_core --mask-dir data/Test_images_GT --tile-sizes 256 512
+"""
+import os
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from crack_metrics.analysis import MaskAnalysis
+from crack_metrics.out_of_core import quantify_out_of_core
+from utils.path_utils import list_image_paths
+from benchmarks.synthetic import synthetic_crack
+
+KEYS = ["area_px", "length_px", "geometric_length_px", "avg_width_px", "max_width_px"]
+
+
+def in_memory_totals(mask: np.ndarray) -> dict:
+    analysis = MaskAnalysis(mask)
+    return {k: getattr(analysis, k) for k in KEYS}
+
+
+def diff(totals: dict, reference: dict) -> dict:
+    """与整图结果不一致的指标 → [整图, 分块]"""
+    return {k: [reference[k], totals[k]] for k in KEYS if round(totals[k], 6) != round(reference[k], 6)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分块量化与整图计算一致性")
+    parser.add_argument("--mask-dir", default="data/Test_images_GT")
+    parser.add_argument("--synthetic-sizes", type=int, nargs="*", default=[1024])
+    parser.add_argument("--tile-sizes", type=int, nargs="*", default=[256, 512])
+    parser.add_argument("--halo", type=int, default=64)
+    parser.add_argument("--output", default="outputs/bench/out_of_core.json")
+    args = parser.parse_args()
+
+    masks = []
+    if args.mask_dir and os.path.isdir(args.mask_dir):
+        for path in list_image_paths(args.mask_dir):
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                masks.append((os.path.splitext(os.path.basename(path))[0], image))
+    for size in args.synthetic_sizes:
+        binary, _ = synthetic_crack(size, length=size * 2, width=8, branches=3, noise=0.2)
+        masks.append((f"synthetic_{size}", binary * 255))
+
+    rows, mismatches = [], []
+    for name, mask in masks:
+        t0 = time.perf_counter()
+        reference = in_memory_totals(mask)
+        ref_s = time.perf_counter() - t0
+
+        # 单块 + halo=0：与整图计算同一窗口，必须逐项相同
+        single = diff(quantify_out_of_core(mask, tile_size=max(mask.shape), halo=0), reference)
+        if single:
+            mismatches.append({"mask": name, "diff": single})
+
+        for tile_size in args.tile_sizes:
+            t0 = time.perf_counter()
+            totals = quantify_out_of_core(mask, tile_size=tile_size, halo=args.halo)
+            row = {
+                "mask": name,
+                "shape": list(mask.shape),
+                "tile_size": tile_size,
+                "halo": args.halo,
+                "in_memory_ms": round(ref_s * 1000, 2),
+                "out_of_core_ms": round((time.perf_counter() - t0) * 1000, 2),
+                "single_tile_exact": not single,
+                "diff": diff(totals, reference)
+            }
+            print(json.dumps(row, ensure_ascii=False))
+            rows.append(row)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    print(f"✅ 结果已保存: {args.output}")
+
+    if mismatches:
+        print(json.dumps({"mismatches": mismatches}, ensure_ascii=False, indent=2))
+        raise SystemExit(f"❌ {len(mismatches)} 张掩膜单块 halo=0 结果与整图不一致")
+    print("✅ 单块 halo=0 结果与整图完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+分割吞吐 / 延迟基准测试。
+
+示例：
+    python -m benchmarks.bench_segment --sizes 512 896 --batch-sizes 1 4 --threads 1 4 \
+        --backends torch optimized onnx --output outputs/bench/segment.json
+    python -m benchmarks.bench_segment --save-baseline outputs/bench/baseline.json    # 记录基线
+    python -m benchmarks.bench_segment --baseline outputs/bench/baseline.json         # 回归检查
+
+无 checkpoint 时使用随机初始化的 UNet（只测速度，不看精度），可在纯 CPU Linux 机器上运行。
+"""
+import os
+import csv
+import json
+import time
+import argparse
+import tempfile
+import resource
+
+import numpy as np
+import torch
+
+from models.unet import UNet
+from models.export import artifact_path, export_onnx, export_torchscript, load_eager_model
+from models.optimize import optimize_for_inference
+from models.backends import OnnxBackend, TorchScriptBackend
+
+
+def _reset_peak_rss():
+    """Linux 下清零 VmHWM，使峰值 RSS 按配置分别统计；不支持时忽略。"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # 回退：进程生命周期内的峰值（Linux 单位 KB）
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def resolve_checkpoint(checkpoint_path: str, workdir: str) -> tuple[str, bool]:
+    """checkpoint 不存在时保存一个随机初始化的 UNet，返回 (路径, 是否随机)。"""
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        return checkpoint_path, False
+    torch.manual_seed(0)
+    path = os.path.join(workdir, "unet_random.pth")
+    torch.save(UNet(in_channels=3, num_classes=1).state_dict(), path)
+    return path, True
+
+
+def load_bench_backend(backend: str, checkpoint_path: str, input_size: int, num_threads: int, workdir: str):
+    """按名称加载待测后端，导出类后端在缺少产物时导出到临时目录。"""
+    torch.set_num_threads(num_threads)
+    if backend == "torch":
+        return load_eager_model(checkpoint_path)
+    if backend == "optimized":
+        return optimize_for_inference(load_eager_model(checkpoint_path), num_threads=num_threads)
+    if backend == "torchscript":
+        path = artifact_path(checkpoint_path, "torchscript")
+        if not os.path.exists(path):
+            path = export_torchscript(checkpoint_path, os.path.join(workdir, "unet.ts.pt"), input_size=input_size)
+        return TorchScriptBackend(path)
+    if backend == "onnx":
+        path = artifact_path(checkpoint_path, "onnx")
+        if not os.path.exists(path):
+            path = os.path.join(workdir, "unet.onnx")
+            if not os.path.exists(path):
+                export_onnx(checkpoint_path, path, input_size=input_size)
+        return OnnxBackend(path, num_threads=num_threads)
+    if backend == "int8":
+        path = artifact_path(checkpoint_path, "int8")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"INT8 模型不存在，请先运行 python -m models.quantize: {path}")
+        return TorchScriptBackend(path)
+    raise ValueError(f"未知后端: {backend}")
+
+
+def sample_inputs(image_dir: str, num_images: int, size: int) -> torch.Tensor:
+    """优先从 image_dir 采样真实图像，不足时补随机图像；返回 (N, 3, size, size)。"""
+    import cv2
+
+    images = []
+    if image_dir and os.path.isdir(image_dir):
+        from utils.path_utils import list_image_paths
+        for p in list_image_paths(image_dir)[:num_images]:
+            img = cv2.imread(p)
+            if img is not None:
+                img = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), (size, size))
+                images.append(torch.from_numpy(img).permute(2, 0, 1).float() / 255.0)
+    rng = torch.Generator().manual_seed(0)
+    while len(images) < num_images:
+        images.append(torch.rand(3, size, size, generator=rng))
+    return torch.stack(images)
+
+
+def bench_config(model, inputs: torch.Tensor, batch_size: int, iters: int, warmup: int) -> dict:
+    """对同一模型重复推理 iters 个批次，返回批次延迟分位数与吞吐。"""
+    n = inputs.shape[0]
+    batches = [inputs[[(i * batch_size + k) % n for k in range(batch_size)]] for i in range(max(n // batch_size, 1))]
+
+    with torch.inference_mode():
+        for i in range(warmup):
+            model(batches[i % len(batches)])
+        latencies = []
+        for i in range(iters):
+            t0 = time.perf_counter()
+            torch.sigmoid(model(batches[i % len(batches)]))
+            latencies.append(time.perf_counter() - t0)
+
+    lat = np.array(latencies)
+    return {
+        "p50_ms": round(float(np.percentile(lat, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(lat, 95)) * 1000, 2),
+        "images_per_s": round(batch_size * iters / float(lat.sum()), 3)
+    }
+
+
+def compare_with_baseline(results: list, baseline: list, tolerance: float) -> list:
+    """返回回归列表：p50 变慢或吞吐下降超过 tolerance 的配置。"""
+    def key(r):
+        return (r["backend"], r["input_size"], r["batch_size"], r["threads"])
+
+    base = {key(r): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = base.get(key(r))
+        if not b:
+            continue
+        if r["p50_ms"] > b["p50_ms"] * (1 + tolerance) or r["images_per_s"] < b["images_per_s"] * (1 - tolerance):
+            regressions.append({
+                "config": dict(zip(["backend", "input_size", "batch_size", "threads"], key(r))),
+                "p50_ms": [b["p50_ms"], r["p50_ms"]],
+                "images_per_s": [b["images_per_s"], r["images_per_s"]]
+            })
+    return regressions
+
+
+def write_results(results: list, output: str):
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    csv_path = os.path.splitext(output)[0] + ".csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+    return output, csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="裂缝分割吞吐 / 延迟基准")
+    parser.add_argument("--checkpoint", default="checkpoints/unet_best.pth")
+    parser.add_argument("--image-dir", default="data/Test_images")
+    parser.add_argument("--num-images", type=int, default=8)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 896])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[os.cpu_count() or 1])
+    parser.add_argument("--backends", nargs="+", default=["torch", "optimized"])
+    parser.add_argument("--iters", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", default="outputs/bench/segment.json")
+    parser.add_argument("--baseline", default=None, help="基线 JSON；给定时比较并在回归时以非零码退出")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对退化比例")
+    parser.add_argument("--save-baseline", default=None, help="将本次结果另存为基线 JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        checkpoint, is_random = resolve_checkpoint(args.checkpoint, workdir)
+        if is_random:
+            print(f"⚠️ 未找到 checkpoint，使用随机初始化 UNet: {args.checkpoint}")
+
+        for backend in args.backends:
+            for threads in args.threads:
+                for size in args.sizes:
+                    _reset_peak_rss()
+                    t0 = time.perf_counter()
+                    model = load_bench_backend(backend, checkpoint, size, threads, workdir)
+                    load_s = time.perf_counter() - t0
+                    inputs = sample_inputs(args.image_dir, args.num_images, size)
+                    for bs in args.batch_sizes:
+                        row = {
+                            "backend": backend,
+                            "input_size": size,
+                            "batch_size": bs,
+                            "threads": threads,
+                            "model_load_s": round(load_s, 3),
+                            **bench_config(model, inputs, bs, args.iters, args.warmup),
+                            "peak_rss_mb": _peak_rss_mb(),
+                            "random_weights": is_random
+                        }
+                        print(json.dumps(row, ensure_ascii=False))
+                        results.append(row)
+                    del model
+
+    json_path, csv_path = write_results(results, args.output)
+    print(f"✅ 结果已保存: {json_path} / {csv_path}")
+    if args.save_baseline:
+        write_results(results, args.save_baseline)
+        print(f"📌 基线已更新: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(json.dumps({"regressions": regressions}, ensure_ascii=False, indent=2))
+            raise SystemExit(f"❌ 发现 {len(regressions)} 项性能回归（容差 {args.tolerance:.0%}）")
+        print("✅ 与基线相比无性能回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+程序化合成裂缝掩膜：随机游走中心线 + 指定线宽绘制，可加分支与边界噪声，
+同时返回解析真值（中心线长度、线宽、分支段数），用作 crack_metrics 的精度参照。
+
+示例：
+    mask, truth = synthetic_crack(1024, length=800, width=6, branches=2, seed=0)
+"""
+import numpy as np
+import cv2
+
+
+def random_walk(
+    rng: np.random.Generator,
+    size: int,
+    length: float,
+    start: np.ndarray,
+    heading: float,
+    step: float = 4.0,
+    turn_std: float = 0.12,
+    margin: int = 16
+) -> np.ndarray:
+    """
+    航向随机游走的中心线折线 (K, 2) [x, y]（整数像素）：每步前进 step，航向加 N(0, turn_std) 扰动。
+    走满 length 或触及图像边距时停止；航向扰动较小，折线基本不自交。
+    """
+    pts = [np.asarray(start, dtype=np.float64)]
+    walked = 0.0
+    while walked < length:
+        heading += rng.normal(0, turn_std)
+        nxt = pts[-1] + step * np.array([np.cos(heading), np.sin(heading)])
+        if np.any(nxt < margin) or np.any(nxt > size - 1 - margin):
+            break
+        pts.append(nxt)
+        walked += step
+    return np.round(np.array(pts)).astype(np.int32)
+
+
+def polyline_length(pts: np.ndarray) -> float:
+    return float(np.linalg.norm(np.diff(pts, axis=0), axis=1).sum()) if len(pts) > 1 else 0.0
+
+
+def synthetic_crack(
+    size: int = 1024,
+    length: float = 800,
+    width: int = 6,
+    branches: int = 0,
+    noise: float = 0.0,
+    seed: int = 0,
+    turn_std: float = 0.12
+) -> tuple[np.ndarray, dict]:
+    """
+    合成单条裂缝（0/1 uint8 掩膜）及其解析真值：
+        主干：从左侧边距内出发、大致向右的随机游走，长度 length（受图像大小截断）
+        分支：branches 条，从主干 20%~80% 处的不同位置以 ±(30°~80°) 岔出，长度为主干的 20%~40%
+        噪声：以概率 noise 翻转裂缝边界 2 像素带内的像素，再做 3×3 中值滤波（模拟分割边缘毛刺，
+              不留孤立噪点和内部小孔）；noise 越大边缘越粗糙，0.3 以上开始出现骨架毛刺分支
+    真值：
+        length_px        所有中心线折线长度之和
+        width_px         绘制线宽
+        branch_count     分支段数（每条分支在 T 形交点把主干一分为二：1 + 2 × branches）
+        polylines        中心线折线列表
+    """
+    rng = np.random.default_rng(seed)
+    margin = width + 4
+    start = np.array([margin, rng.uniform(size * 0.3, size * 0.7)])
+    trunk = random_walk(rng, size, length, start, rng.normal(0, 0.2), turn_std=turn_std, margin=margin)
+    polylines = [trunk]
+
+    if branches and len(trunk) > 10:
+        # 分支起点在主干上互不相邻，避免交叉点合并
+        candidates = np.arange(int(len(trunk) * 0.2), int(len(trunk) * 0.8))
+        picks = np.sort(rng.choice(candidates, size=min(branches, len(candidates) // 4), replace=False))
+        trunk_len = polyline_length(trunk)
+        for i in picks:
+            d = trunk[min(i + 1, len(trunk) - 1)] - trunk[max(i - 1, 0)]
+            angle = np.arctan2(d[1], d[0]) + rng.choice([-1, 1]) * rng.uniform(np.pi / 6, np.pi * 4 / 9)
+            branch = random_walk(rng, size, trunk_len * rng.uniform(0.2, 0.4), trunk[i], angle,
+                                 turn_std=turn_std, margin=margin)
+            if len(branch) > 1:
+                polylines.append(branch)
+
+    mask = np.zeros((size, size), dtype=np.uint8)
+    cv2.polylines(mask, polylines, False, 1, width)
+
+    if noise > 0:
+        band = cv2.morphologyEx(mask, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8)) > 0
+        flip = band & (rng.random(mask.shape) < noise)
+        mask[flip] ^= 1
+        mask = cv2.medianBlur(mask, 3)
+
+    truth = {
+        "length_px": round(sum(polyline_length(p) for p in polylines), 2),
+        "width_px": width,
+        "branch_count": 1 + 2 * (len(polylines) - 1),
+        "polylines": polylines
+    }
+    return mask, truth
@@ -0,0 +1,130 @@
+from functools import cached_property
+
+import cv2
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .binarize import binarize
+from .skeleton import extract_skeleton_and_normals, skeleton_normals
+from .skeleton_graph import SkeletonGraph
+from .width_engine import max_width_from_points, widths_from_distance
+
+
+class MaskAnalysis:
+    """
+    单张掩膜的共享分析对象：二值图、骨架、轮廓点与 KD 树均在首次访问时计算并缓存，
+    所有指标（长度 / 面积 / 平均宽度 / 最大宽度）与可视化都从同一份中间结果派生，
+    避免对同一掩膜重复骨架化。
+
+    用法：
+        analysis = MaskAnalysis(cv2.imread(mask_path))       # 原始图像（彩色或灰度）
+        analysis = MaskAnalysis.from_binary(binary_mask)      # 已是 0/1 掩膜
+    """
+
+    def __init__(self, image: np.ndarray, threshold: int = 127):
+        self.image = image
+        self.threshold = threshold
+
+    @classmethod
+    def from_binary(cls, binary: np.ndarray) -> "MaskAnalysis":
+        analysis = cls(binary)
+        analysis.__dict__["binary"] = (binary > 0).astype(np.uint8)
+        return analysis
+
+    @cached_property
+    def binary(self) -> np.ndarray:
+        return binarize(self.image, self.threshold)
+
+    @cached_property
+    def _skeleton(self) -> tuple:
+        return extract_skeleton_and_normals(self.binary, with_normals=False)
+
+    @property
+    def skeleton(self) -> np.ndarray:
+        """骨架二值图（0/1）"""
+        return self._skeleton[0]
+
+    @property
+    def skeleton_points(self) -> np.ndarray:
+        """(N, 2) 骨架点坐标 [x, y]"""
+        return self._skeleton[1]
+
+    @cached_property
+    def normals(self) -> np.ndarray:
+        """(N, 2) 骨架点单位法向，仅在可视化 / 垂向测量需要时计算"""
+        return skeleton_normals(self.skeleton_points)
+
+    @cached_property
+    def graph(self) -> SkeletonGraph:
+        """骨架图（端点 / 交叉点 / 分支），构建一次后供指标与可视化复用"""
+        return SkeletonGraph(self.skeleton)
+
+    @cached_property
+    def contour_points(self) -> np.ndarray:
+        """
+        外轮廓点 (M, 2) [x, y]，去重并按行优先排序；无轮廓时为空数组。
+        固定顺序使最大宽度的 KD 树并列取舍与分块路径（crack_metrics.out_of_core）一致。
+        """
+        contours, _ = cv2.findContours((self.binary * 255).astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        if not contours:
+            return np.empty((0, 2), dtype=np.int32)
+        points = np.vstack([c.reshape(-1, 2) for c in contours])
+        return np.unique(points[:, ::-1], axis=0)[:, ::-1].copy()
+
+    @cached_property
+    def contour_tree(self) -> cKDTree | None:
+        if len(self.contour_points) == 0:
+            return None
+        return cKDTree(self.contour_points)
+
+    @cached_property
+    def distance_map(self) -> np.ndarray:
+        """裂缝区域内每个像素到最近背景像素的欧氏距离"""
+        return cv2.distanceTransform(self.binary, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+
+    @cached_property
+    def widths(self) -> np.ndarray:
+        """沿骨架逐点的宽度数组（像素），与 skeleton_points 一一对应"""
+        return widths_from_distance(self.distance_map, self.skeleton)
+
+    @cached_property
+    def area_px(self) -> int:
+        return int(np.sum(self.binary))
+
+    @cached_property
+    def length_px(self) -> int:
+        """骨架点数量作为长度估计"""
+        return len(self.skeleton_points)
+
+    @property
+    def geometric_length_px(self) -> float:
+        """骨架图边权之和（对角步长 √2）"""
+        return self.graph.total_length
+
+    @cached_property
+    def avg_width_px(self) -> float:
+        """平均宽度 = 区域面积 / 骨架长度"""
+        if self.length_px == 0:
+            return 0.0
+        return round(self.area_px / self.length_px, 2)
+
+    @cached_property
+    def _max_width(self) -> tuple:
+        """(最大宽度, 所在骨架点, 对应的两个轮廓点)，由向量化宽度引擎一次算出。"""
+        if self.contour_tree is None:
+            return 0.0, None, None
+        return max_width_from_points(self.skeleton_points, self.contour_points, self.contour_tree)
+
+    @property
+    def max_width_px(self) -> float:
+        return round(float(self._max_width[0]), 2)
+
+    @property
+    def max_width_pair(self) -> tuple | None:
+        """最大宽度对应的两个轮廓点 ((x1, y1), (x2, y2))"""
+        return self._max_width[2]
+
+    @property
+    def max_width_location(self) -> np.ndarray | None:
+        """最大宽度所在的骨架点 [x, y]"""
+        return self._max_width[1]
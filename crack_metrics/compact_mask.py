@@ -0,0 +1,165 @@
+import os
+
+import cv2
+import numpy as np
+
+from .analysis import MaskAnalysis
+from .binarize import binarize
+from .skeleton import ROI_PAD
+
+# 游程掩膜文件后缀（np.savez，未压缩以保证加载速度）
+RLE_SUFFIX = ".rle.npz"
+
+
+class RunLengthMask:
+    """
+    按行游程编码的二值掩膜：每段前景记为 (行号, 起始列, 结束列+1)。
+    裂缝掩膜通常 95% 以上为背景，游程数与裂缝穿过的行数同阶，体积远小于稠密 uint8 / PNG。
+
+    面积与外接框直接由游程计算；需要骨架化等稠密运算时，只把外接框（含边距）展开为 ROI，
+    所有与平移无关的指标在 ROI 上计算结果与整图相同。与 0/255 PNG 之间的转换无损。
+
+    用法：
+        rle = RunLengthMask.from_png("outputs/masks/xxx.png")
+        rle.save("outputs/masks/xxx.rle.npz")
+        analysis, (x0, y0) = rle.analysis()      # 在 ROI 上计算指标，坐标需加偏移
+    """
+
+    def __init__(self, shape: tuple, rows: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        self.shape = tuple(int(s) for s in shape[:2])
+        # 边长不超过 65535 时用 uint16 存坐标（结束列最大等于宽度），体积减半
+        dtype = np.uint16 if max(self.shape) <= np.iinfo(np.uint16).max else np.uint32
+        self.rows = np.asarray(rows).astype(dtype, copy=False)
+        self.starts = np.asarray(starts).astype(dtype, copy=False)
+        self.ends = np.asarray(ends).astype(dtype, copy=False)
+
+    @classmethod
+    def from_binary(cls, binary: np.ndarray) -> "RunLengthMask":
+        """0/1（或非零即前景）掩膜 → 游程；只在非零外接框内做差分。"""
+        fg = (binary > 0).astype(np.uint8)
+        x, y, w, h = cv2.boundingRect(fg)
+        if w == 0 or h == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(binary.shape, empty, empty, empty)
+
+        # 左右各补一列 0，+1 处为游程起点，-1 处为终点（不含）
+        crop = np.pad(fg[y:y + h, x:x + w].view(np.int8), ((0, 0), (1, 1)))
+        change = np.diff(crop, axis=1)
+        rows, starts = np.nonzero(change == 1)
+        _, ends = np.nonzero(change == -1)
+        return cls(binary.shape, rows + y, starts + x, ends + x)
+
+    @classmethod
+    def from_image(cls, image: np.ndarray, threshold: int = 127) -> "RunLengthMask":
+        return cls.from_binary(binarize(image, threshold))
+
+    @classmethod
+    def from_png(cls, path: str, threshold: int = 127) -> "RunLengthMask":
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Invalid image format: {path}")
+        return cls.from_image(image, threshold)
+
+    @classmethod
+    def load(cls, path: str) -> "RunLengthMask":
+        with np.load(path) as data:
+            return cls(tuple(data["shape"]), data["rows"], data["starts"], data["ends"])
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, shape=np.array(self.shape), rows=self.rows, starts=self.starts, ends=self.ends)
+        return path
+
+    @property
+    def run_count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        """游程数组占用的内存字节数"""
+        return self.rows.nbytes + self.starts.nbytes + self.ends.nbytes
+
+    @property
+    def area_px(self) -> int:
+        return int((self.ends.astype(np.int64) - self.starts).sum())
+
+    @property
+    def bbox(self) -> tuple:
+        """前景外接框 (x, y, w, h)，与 cv2.boundingRect 一致；空掩膜为 (0, 0, 0, 0)"""
+        if self.run_count == 0:
+            return 0, 0, 0, 0
+        x0, y0 = int(self.starts.min()), int(self.rows.min())
+        return x0, y0, int(self.ends.max()) - x0, int(self.rows.max()) + 1 - y0
+
+    def _fill(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """把游程展开到窗口 [y0:y1, x0:x1]（窗口需包含全部游程）：起点 +1、终点 −1 后按行累加。"""
+        h, w = y1 - y0, x1 - x0
+        delta = np.zeros((h, w + 1), dtype=np.int8)
+        r = self.rows.astype(np.int64) - y0
+        delta[r, self.starts.astype(np.int64) - x0] = 1
+        delta[r, self.ends.astype(np.int64) - x0] = -1
+        return np.cumsum(delta[:, :w], axis=1, dtype=np.int8).astype(np.uint8)
+
+    def roi(self, pad: int = ROI_PAD) -> tuple:
+        """只展开外接框（四周扩 pad 并裁到图像范围内）：返回 (0/1 ROI 数组, (x0, y0))。"""
+        x, y, w, h = self.bbox
+        if w == 0:
+            return np.zeros((0, 0), dtype=np.uint8), (0, 0)
+        x0, y0 = max(x - pad, 0), max(y - pad, 0)
+        x1, y1 = min(x + w + pad, self.shape[1]), min(y + h + pad, self.shape[0])
+        return self._fill(x0, y0, x1, y1), (x0, y0)
+
+    def to_binary(self) -> np.ndarray:
+        """完整 0/1 稠密掩膜"""
+        return self._fill(0, 0, self.shape[1], self.shape[0])
+
+    def to_png(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        cv2.imwrite(path, self.to_binary() * 255)
+        return path
+
+    def analysis(self, pad: int = ROI_PAD) -> tuple:
+        """
+        在 ROI 上构建 MaskAnalysis：长度 / 面积 / 宽度 / 分支等指标与整图一致，
+        max_width_location 等坐标相对 ROI，需加上返回的偏移 (x0, y0)。
+        """
+        roi, offset = self.roi(pad)
+        if roi.size == 0:
+            roi = np.zeros((1, 1), dtype=np.uint8)
+        return MaskAnalysis.from_binary(roi), offset
+
+
+def is_rle_path(path: str) -> bool:
+    return path.lower().endswith(RLE_SUFFIX)
+
+
+def png_to_rle(png_path: str, rle_path: str | None = None, threshold: int = 127) -> str:
+    """PNG 掩膜 → 游程文件（默认与 PNG 同目录同名，后缀 .rle.npz）"""
+    rle_path = rle_path or os.path.splitext(png_path)[0] + RLE_SUFFIX
+    return RunLengthMask.from_png(png_path, threshold).save(rle_path)
+
+
+def rle_to_png(rle_path: str, png_path: str | None = None) -> str:
+    """游程文件 → 0/255 PNG 掩膜"""
+    png_path = png_path or rle_path[:-len(RLE_SUFFIX)] + ".png"
+    return RunLengthMask.load(rle_path).to_png(png_path)
+
+
+def mask_stem(path: str) -> str:
+    """掩膜文件名去掉目录与后缀（含 .rle.npz）"""
+    name = os.path.basename(path)
+    return name[:-len(RLE_SUFFIX)] if is_rle_path(name) else os.path.splitext(name)[0]
+
+
+def load_mask_analysis(path: str, threshold: int = 127) -> tuple:
+    """
+    按后缀读取掩膜并构建 MaskAnalysis，返回 (analysis, (x0, y0))：
+    游程文件只展开 ROI（偏移为 ROI 左上角），其他图像格式整图解码（偏移为 (0, 0)）。
+    """
+    if is_rle_path(path):
+        return RunLengthMask.load(path).analysis()
+    mask = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if mask is None:
+        raise ValueError(f"Invalid image format: {path}")
+    return MaskAnalysis(mask, threshold), (0, 0)
@@ -0,0 +1,61 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from skimage.measure import label, regionprops
+
+from .analysis import MaskAnalysis
+from .width_profile import summarize_widths
+
+
+def instance_crops(binary: np.ndarray, min_area: int = 1, connectivity: int = 2) -> list:
+    """
+    连通域标注并按外接框裁剪：每个实例只保留自身像素（外接框内的其他实例被排除），
+    四周补 1 像素背景，保证轮廓与距离变换在裁剪边缘处正确。
+    返回 [(实例编号, 裁剪掩膜, (x, y, w, h)), ...]，按标签顺序排列。
+    """
+    labels = label(binary > 0, connectivity=connectivity)
+    crops = []
+    for region in regionprops(labels):
+        if region.area < min_area:
+            continue
+        min_r, min_c, max_r, max_c = region.bbox
+        crop = np.pad(region.image.astype(np.uint8), 1)
+        crops.append((region.label, crop, (int(min_c), int(min_r), int(max_c - min_c), int(max_r - min_r))))
+    return crops
+
+
+def _instance_metrics(item: tuple) -> dict:
+    """单个实例的像素单位指标（在裁剪后的小图上计算）"""
+    instance_id, crop, bbox = item
+    analysis = MaskAnalysis.from_binary(crop)
+    profile = summarize_widths(analysis.widths)
+    return {
+        "instance": int(instance_id),
+        "bbox": bbox,
+        "area_px": analysis.area_px,
+        "length_px": analysis.length_px,
+        "geometric_length_px": round(analysis.geometric_length_px, 2),
+        "branch_count": analysis.graph.branch_count,
+        "avg_width_px": analysis.avg_width_px,
+        "max_width_px": analysis.max_width_px,
+        "width_p50_px": profile["p50"],
+        "width_p90_px": profile["p90"]
+    }
+
+
+def compute_instance_metrics(
+    binary: np.ndarray,
+    num_workers: int = 0,
+    min_area: int = 1,
+    chunksize: int = 8
+) -> list:
+    """
+    逐条裂缝（8 邻接连通域）计算长度 / 面积 / 宽度。num_workers > 1 时用进程池并行，
+    只传输裁剪后的小图；否则在当前进程顺序计算。返回按实例编号排序的指标列表（像素单位）。
+    """
+    crops = instance_crops(binary, min_area)
+    if num_workers > 1 and len(crops) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp.get_context("spawn")) as pool:
+            return list(pool.map(_instance_metrics, crops, chunksize=chunksize))
+    return [_instance_metrics(item) for item in crops]
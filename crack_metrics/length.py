@@ -1,9 +1,10 @@
 import numpy as np
-from .skeleton import extract_skeleton_and_normals
+from .analysis import MaskAnalysis
 
-def compute_crack_length_px(mask: np.ndarray) -> int:
+def compute_crack_length_px(mask: np.ndarray, analysis: MaskAnalysis | None = None) -> int:
     """
     计算裂缝长度（单位：像素），使用骨架点数量作为估计值。
+    已有 MaskAnalysis 时直接复用其骨架。
     """
-    _, skeleton_points, _ = extract_skeleton_and_normals(mask)
-    return len(skeleton_points)
+    analysis = analysis or MaskAnalysis.from_binary(mask)
+    return analysis.length_px
@@ -0,0 +1,181 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .compact_mask import load_mask_analysis, mask_stem
+from .out_of_core import OutOfCoreAnalysis
+from .width_profile import compute_width_profile_px
+
+
+# CSV 列名 → (像素键, 换算幂次)：毫米值 = 像素值 × pixel_size_mm ** 幂次（幂次 0 为计数，不换算）
+PIXEL_METRICS = {
+    "Length (mm)": ("length_px", 1),
+    "Area (mm^2)": ("area_px", 2),
+    "Max Width (mm)": ("max_width_px", 1),
+    "Avg Width (mm)": ("avg_width_px", 1),
+    "Geometric Length (mm)": ("geometric_length_px", 1),
+    "Branch Count": ("branch_count", 0),
+    "Width P50 (mm)": ("width_p50_px", 1),
+    "Width P90 (mm)": ("width_p90_px", 1),
+    "Width P99 (mm)": ("width_p99_px", 1),
+    "Width Profile Max (mm)": ("width_profile_max_px", 1),
+}
+
+METRIC_ALIASES = {
+    "Length (mm)": "length",
+    "Area (mm^2)": "area",
+    "Max Width (mm)": "max_width",
+    "Avg Width (mm)": "avg_width",
+    "Geometric Length (mm)": "geometric_length",
+    "Branch Count": "branch_count",
+    "Width P50 (mm)": "width_p50",
+    "Width P90 (mm)": "width_p90",
+    "Width P99 (mm)": "width_p99",
+    "Width Profile Max (mm)": "width_profile_max",
+}
+
+# 未指定 metrics 时的默认列（与原 CSV 表头一致）；其余指标需显式请求，或传 ["all"]
+DEFAULT_COLUMNS = ["Length (mm)", "Area (mm^2)", "Max Width (mm)", "Avg Width (mm)"]
+
+
+def select_metrics(metrics: list | None = None, available: list | None = None) -> list:
+    """请求的指标名 / 别名 → CSV 列名列表（顺序与请求一致）；为空时返回 DEFAULT_COLUMNS，"all" 选中全部。"""
+    available = list(available or PIXEL_METRICS)
+    if not metrics:
+        return [k for k in DEFAULT_COLUMNS if k in available]
+    if any(m.lower() == "all" for m in metrics):
+        return available
+
+    selected = []
+    for m in metrics:
+        # 优先按别名精确匹配（如 length 不应同时选中 Geometric Length）
+        exact = [k for k, a in METRIC_ALIASES.items() if a == m.lower() and k in available]
+        for k in exact or available:
+            if m.lower().replace(" ", "").replace("_", "") in k.lower().replace(" ", "").replace("_", ""):
+                selected.append(k)
+    return selected
+
+
+def compute_pixel_metrics(analysis, selected: list) -> dict:
+    """
+    由 MaskAnalysis / OutOfCoreAnalysis 计算所选指标的像素值（与标定无关，可按掩膜内容缓存）。
+    用到宽度分位数时一并返回像素单位的宽度直方图 width_histogram_px。
+    """
+    if isinstance(analysis, OutOfCoreAnalysis):
+        profile_fn = lambda: analysis.width_profile
+    else:
+        profile_fn = lambda: compute_width_profile_px(analysis.binary, analysis)
+    profile = {}
+
+    def width_stat(key: str) -> float:
+        # 距离变换宽度剖面按需计算一次
+        if not profile:
+            profile.update(profile_fn())
+        return profile[key]
+
+    getters = {
+        "length_px": lambda: analysis.length_px,
+        "area_px": lambda: analysis.area_px,
+        "max_width_px": lambda: analysis.max_width_px,
+        "avg_width_px": lambda: analysis.avg_width_px,
+        "geometric_length_px": lambda: analysis.geometric_length_px,
+        "branch_count": lambda: analysis.graph.branch_count,
+        "width_p50_px": lambda: width_stat("p50"),
+        "width_p90_px": lambda: width_stat("p90"),
+        "width_p99_px": lambda: width_stat("p99"),
+        "width_profile_max_px": lambda: width_stat("max"),
+    }
+    pixel_values = {}
+    for name in selected:
+        key = PIXEL_METRICS[name][0]
+        value = getters[key]()
+        pixel_values[key] = value.item() if hasattr(value, "item") else value
+    if profile:
+        pixel_values["width_histogram_px"] = profile["histogram"]
+    return pixel_values
+
+
+def pixel_to_mm(pixel_values: dict, pixel_size_mm: float, selected: list | None = None) -> tuple[dict, dict]:
+    """
+    像素值 → 毫米值，返回 (csv_values: CSV 列名 → 值, results: 别名 → 值，另含宽度直方图)。
+    selected 为空时换算 pixel_values 中已有的全部指标。
+    """
+    if selected is None:
+        selected = [name for name, (key, _) in PIXEL_METRICS.items() if key in pixel_values]
+
+    csv_values = {}
+    for name in selected:
+        key, power = PIXEL_METRICS[name]
+        value = pixel_values[key]
+        csv_values[name] = round(value * pixel_size_mm ** power, 2) if power else value
+    results = {METRIC_ALIASES[name]: value for name, value in csv_values.items()}
+
+    hist = pixel_values.get("width_histogram_px")
+    if hist and any(PIXEL_METRICS[name][0].startswith("width_") for name in selected):
+        # 完整分布仅随结果返回，不写入 CSV
+        results["width_histogram"] = {
+            "counts": hist["counts"],
+            "bin_edges_mm": [round(e * pixel_size_mm, 3) for e in hist["bin_edges"]]
+        }
+    return csv_values, results
+
+
+def compute_metric_values(analysis, pixel_size_mm: float, metrics: list | None = None) -> tuple[dict, dict]:
+    """
+    由 MaskAnalysis / OutOfCoreAnalysis 计算所选指标（毫米单位）。
+    返回 (csv_values: CSV 列名 → 值, results: 别名 → 值，另含宽度直方图及像素值 pixel_metrics)。
+    quantify_crack_metrics 与批量量化共用此函数，保证数值一致。
+    """
+    available = list(PIXEL_METRICS)
+    if isinstance(analysis, OutOfCoreAnalysis):
+        # 分支拆分需要整图骨架图，分块模式不提供
+        available.remove("Branch Count")
+
+    selected = select_metrics(metrics, available)
+    pixel_values = compute_pixel_metrics(analysis, selected)
+    csv_values, results = pixel_to_mm(pixel_values, pixel_size_mm, selected)
+    results["pixel_metrics"] = pixel_values
+    return csv_values, results
+
+
+def _quantify_chunk(args: tuple) -> list:
+    """worker：对一组掩膜逐张计算指标，返回 [(image_name, csv_values | None, error | None), ...]。"""
+    mask_paths, pixel_size_mm, metrics = args
+    rows = []
+    for path in mask_paths:
+        image_name = mask_stem(path)
+        try:
+            csv_values, _ = compute_metric_values(load_mask_analysis(path)[0], pixel_size_mm, metrics)
+            rows.append((image_name, csv_values, None))
+        except Exception as e:
+            rows.append((image_name, None, str(e)))
+    return rows
+
+
+def quantify_masks(
+    mask_paths: list,
+    pixel_size_mm: float,
+    metrics: list | None = None,
+    num_workers: int = 0,
+    chunk_size: int = 32
+) -> tuple[pd.DataFrame, list]:
+    """
+    批量量化：掩膜按 chunk_size 分块，num_workers > 1 时分发到进程池，否则在当前进程顺序计算。
+    返回 (按输入顺序排列的 DataFrame，首列 Image；失败列表 [{"image", "error"}])。
+    """
+    chunks = [(mask_paths[i:i + chunk_size], pixel_size_mm, metrics) for i in range(0, len(mask_paths), chunk_size)]
+    if num_workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp.get_context("spawn")) as pool:
+            chunk_rows = list(pool.map(_quantify_chunk, chunks))
+    else:
+        chunk_rows = [_quantify_chunk(c) for c in chunks]
+
+    records, errors = [], []
+    for image_name, values, error in (r for rows in chunk_rows for r in rows):
+        if error:
+            errors.append({"image": image_name, "error": error})
+        else:
+            records.append({"Image": image_name, **values})
+    return pd.DataFrame(records), errors
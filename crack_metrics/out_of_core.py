@@ -0,0 +1,329 @@
+import os
+import tempfile
+from functools import cached_property
+
+import cv2
+import numpy as np
+from skimage.measure import label
+
+from .analysis import MaskAnalysis
+from .skeleton_graph import skeleton_edges
+from .width_engine import max_width_from_points
+
+
+def open_mask(path: str) -> np.ndarray:
+    """
+    以内存映射方式打开大尺寸掩膜，不把整张图读入内存：
+        .npy        → np.load(mmap_mode="r")
+        .tif/.tiff  → tifffile.memmap（需未压缩、连续存储的 TIFF）
+    其他格式请先用 convert_to_npy 转换一次。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        return np.load(path, mmap_mode="r")
+    if ext in (".tif", ".tiff"):
+        try:
+            import tifffile
+        except ImportError as e:
+            raise ImportError("读取 TIFF 内存映射需要安装 tifffile") from e
+        return tifffile.memmap(path, mode="r")
+    raise ValueError(f"不支持内存映射的掩膜格式: {path}，请先用 convert_to_npy 转为 .npy")
+
+
+def convert_to_npy(image_path: str, npy_path: str | None = None, strip_rows: int = 4096) -> str:
+    """
+    一次性把 PNG / JPG 掩膜转换为 .npy（灰度 uint8），之后即可按内存映射分块读取。
+    解码阶段仍需整图读入一次；写出按行条带进行。
+    """
+    npy_path = npy_path or os.path.splitext(image_path)[0] + ".npy"
+    gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError(f"Invalid image format: {image_path}")
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.uint8, shape=gray.shape)
+    for y in range(0, gray.shape[0], strip_rows):
+        out[y:y + strip_rows] = gray[y:y + strip_rows]
+    out.flush()
+    del out
+    return npy_path
+
+
+def iter_tiles(shape: tuple, tile_size: int, halo: int):
+    """
+    按行优先顺序生成分块：(核心区 y0, y1, x0, x1), (含 halo 的读取窗口 wy0, wy1, wx0, wx1)。
+    核心区互不重叠且覆盖全图；每块只统计核心区内的结果。
+    """
+    h, w = shape[:2]
+    for y0 in range(0, h, tile_size):
+        for x0 in range(0, w, tile_size):
+            y1, x1 = min(y0 + tile_size, h), min(x0 + tile_size, w)
+            yield (y0, y1, x0, x1), (max(y0 - halo, 0), min(y1 + halo, h), max(x0 - halo, 0), min(x1 + halo, w))
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def add(self, a: int):
+        self.parent[a] = a
+
+    def find(self, a: int) -> int:
+        root = a
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[a] != root:
+            self.parent[a], a = root, self.parent[a]
+        return root
+
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        self.parent[rb] = ra
+        return True
+
+
+def _link_seam(uf: _UnionFind, edge: np.ndarray, neighbor: np.ndarray, shifts: tuple = (-1, 0, 1)):
+    """把一条分块边界上的像素与相邻一侧的像素合并到同一连通域；shifts 含 ±1 时按 8 邻接（含对角）合并。"""
+    for shift in shifts:
+        a = edge[max(shift, 0):len(edge) + min(shift, 0)]
+        b = neighbor[max(-shift, 0):len(neighbor) + min(-shift, 0)]
+        both = (a >= 0) & (b >= 0)
+        for pa, pb in set(zip(a[both].tolist(), b[both].tolist())):
+            uf.union(pa, pb)
+
+
+def _tile_labels(mask: np.ndarray, threshold: int, tile_size: int, foreground: bool):
+    """
+    按分块顺序生成每块核心区的连通域标注（前景 8 邻接 / 背景 4 邻接）及其全局编号，
+    并在缝两侧用并查集合并。生成 (核心区坐标, 全局编号数组, 并查集)；背景连通域若触及图像边界，
+    则与编号 -1（图像外部）合并。
+    """
+    h, w = mask.shape[:2]
+    connectivity, shifts = (2, (-1, 0, 1)) if foreground else (1, (0,))
+    uf = _UnionFind()
+    uf.add(-1)
+    next_id = 0
+    prev_bottom = cur_bottom = np.full(w, -1 if foreground else -2, dtype=np.int64)
+    left_col = None
+    empty = -1 if foreground else -2  # 前景图中 -1 表示背景；背景图中 -2 表示前景
+
+    for (y0, y1, x0, x1), _ in iter_tiles(mask.shape, tile_size, 0):
+        if x0 == 0:
+            prev_bottom, cur_bottom = cur_bottom, np.full(w, empty, dtype=np.int64)
+            left_col = None
+        core = np.asarray(mask[y0:y1, x0:x1]) > threshold
+        labels = label(core if foreground else ~core, connectivity=connectivity).astype(np.int64)
+        n_labels = int(labels.max())
+        for k in range(n_labels):
+            uf.add(next_id + k)
+        glabels = np.where(labels > 0, labels - 1 + next_id, empty)
+        next_id += n_labels
+
+        if y0 > 0:
+            lo, hi = max(x0 - 1, 0), min(x1 + 1, w)
+            top = np.full(hi - lo, empty, dtype=np.int64)
+            top[x0 - lo:x0 - lo + (x1 - x0)] = glabels[0]
+            _link_seam(uf, top, prev_bottom[lo:hi], shifts)
+        if left_col is not None:
+            _link_seam(uf, glabels[:, 0], left_col, shifts)
+        if not foreground:
+            # 触及图像边界的背景与图像外部连通
+            border = [glabels[0]] * (y0 == 0) + [glabels[-1]] * (y1 == h) + \
+                     [glabels[:, 0]] * (x0 == 0) + [glabels[:, -1]] * (x1 == w)
+            for ids in border:
+                for i in np.unique(ids[ids >= 0]).tolist():
+                    uf.union(-1, i)
+        left_col = glabels[:, -1].copy()
+        cur_bottom[x0:x1] = glabels[-1]
+        yield (y0, y1, x0, x1), glabels, uf
+
+
+def outer_background(mask: np.ndarray, tile_size: int, threshold: int, out_path: str) -> np.ndarray:
+    """
+    两遍分块计算"外部背景"（与图像外部 4 邻接连通的背景像素），写入磁盘上的 uint8 内存映射。
+    与 cv2.findContours(RETR_EXTERNAL) 一致：外轮廓点 = 有 4 邻居属于外部背景的前景像素，
+    孔洞边界与孔内目标的轮廓都不计入。
+    """
+    uf = None
+    for _, _, uf in _tile_labels(mask, threshold, tile_size, foreground=False):
+        pass
+    outer = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.uint8, shape=mask.shape[:2])
+    outside = uf.find(-1)
+    for (y0, y1, x0, x1), glabels, _ in _tile_labels(mask, threshold, tile_size, foreground=False):
+        ids = np.unique(glabels[glabels >= 0])
+        roots = np.array([uf.find(i) for i in ids.tolist()], dtype=np.int64)
+        lut_ids = ids[roots == outside]
+        outer[y0:y1, x0:x1] = np.isin(glabels, lut_ids)
+    outer.flush()
+    return outer
+
+
+def _window_contour_points(binary: np.ndarray, outer: np.ndarray, at_border: tuple) -> np.ndarray:
+    """
+    窗口内的外轮廓点 [x, y]（行优先，与 MaskAnalysis.contour_points 顺序一致）：有 4 邻居属于外部背景的前景像素。
+    at_border = (上, 下, 左, 右) 是否为图像边界；图像外部视为外部背景，窗口外的非边界侧视为未知（不计）。
+    """
+    top, bottom, left, right = at_border
+    padded = np.zeros((outer.shape[0] + 2, outer.shape[1] + 2), dtype=bool)
+    padded[1:-1, 1:-1] = outer > 0
+    padded[0, :], padded[-1, :] = top, bottom
+    padded[:, 0], padded[:, -1] = left, right
+    touch = padded[:-2, 1:-1] | padded[2:, 1:-1] | padded[1:-1, :-2] | padded[1:-1, 2:]
+    ys, xs = np.nonzero((binary > 0) & touch)
+    return np.stack([xs, ys], axis=1)
+
+
+def _percentile_from_counts(values: np.ndarray, counts: np.ndarray, q: float) -> float:
+    """由 (取值, 频数) 计算与 np.percentile(linear) 完全一致的分位数"""
+    cum = np.cumsum(counts)
+    pos = (cum[-1] - 1) * q / 100.0
+    lo = int(np.floor(pos))
+    v_lo = values[np.searchsorted(cum, lo, side="right")]
+    v_hi = values[np.searchsorted(cum, min(lo + 1, cum[-1] - 1), side="right")]
+    return float(v_lo + (pos - lo) * (v_hi - v_lo))
+
+
+def quantify_out_of_core(mask: np.ndarray, tile_size: int = 2048, halo: int = 64, threshold: int = 127) -> dict:
+    """
+    分块（out-of-core）计算整图指标，内存占用只与 tile_size + 2 * halo 有关。
+
+    每块读取带 halo 的窗口做骨架化 / 距离变换，只统计核心区内的骨架点、面积与边；
+    骨架边按"起点所在核心区"归属，跨缝边只计一次；前景连通域与外部背景在缝两侧用并查集合并，
+    外部背景另存为磁盘上的临时内存映射，使轮廓点与整图 RETR_EXTERNAL 轮廓一致。
+    halo 需大于最大裂缝宽度（建议 >= 2 倍），此时结果与整图内存计算一致。
+
+    mask 可以是 np.memmap / 普通数组（灰度，像素值 > threshold 视为裂缝；0/1 掩膜请传 threshold=0）。
+    返回像素单位的统计：area_px / length_px / geometric_length_px / avg_width_px / max_width_px /
+    max_width_location / width_p50 / width_p90 / width_p99 / width_max / width_histogram / component_count
+    """
+    h, w = mask.shape[:2]
+    area = length = 0
+    geo_length = 0.0
+    best_width, best_loc = 0.0, None
+    width_counts = {}
+    uf = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outer = outer_background(mask, tile_size, threshold, os.path.join(tmp, "outer.npy"))
+
+        for (y0, y1, x0, x1), _, uf in _tile_labels(mask, threshold, tile_size, foreground=True):
+            wy0, wy1, wx0, wx1 = max(y0 - halo, 0), min(y1 + halo, h), max(x0 - halo, 0), min(x1 + halo, w)
+            window = (np.asarray(mask[wy0:wy1, wx0:wx1]) > threshold).astype(np.uint8)
+            cy0, cy1, cx0, cx1 = y0 - wy0, y1 - wy0, x0 - wx0, x1 - wx0
+            core = window[cy0:cy1, cx0:cx1]
+            area += int(core.sum())
+            if not core.any():
+                continue
+
+            analysis = MaskAnalysis.from_binary(window)
+            skel = analysis.skeleton
+            core_skel = np.zeros_like(skel)
+            core_skel[cy0:cy1, cx0:cx1] = skel[cy0:cy1, cx0:cx1]
+            length += int(core_skel.sum())
+
+            # 几何长度：起点落在核心区的边
+            points, src, _, weights = skeleton_edges(skel)
+            in_core = (points[src, 0] >= cx0) & (points[src, 0] < cx1) & (points[src, 1] >= cy0) & (points[src, 1] < cy1)
+            geo_length += float(weights[in_core].sum())
+
+            # 最大宽度：核心区骨架点 + 窗口内外轮廓点
+            contour = _window_contour_points(
+                window, np.asarray(outer[wy0:wy1, wx0:wx1]), (wy0 == 0, wy1 == h, wx0 == 0, wx1 == w)
+            )
+            ys, xs = np.nonzero(core_skel)
+            width, loc, _ = max_width_from_points(np.stack([xs, ys], axis=1), contour)
+            if width > best_width:
+                best_width, best_loc = width, (int(loc[0]) + wx0, int(loc[1]) + wy0)
+
+            # 宽度剖面：按取值累计频数，内存与图像尺寸无关
+            values, counts = np.unique(analysis.widths[core_skel[skel > 0] > 0], return_counts=True)
+            for v, c in zip(values.tolist(), counts.tolist()):
+                width_counts[v] = width_counts.get(v, 0) + c
+
+        del outer
+
+    components = {uf.find(i) for i in uf.parent if i >= 0} if uf else set()
+    result = {
+        "area_px": area,
+        "length_px": length,
+        "geometric_length_px": geo_length,
+        "avg_width_px": round(area / length, 2) if length else 0.0,
+        "max_width_px": round(best_width, 2),
+        "max_width_location": best_loc,
+        "component_count": len(components)
+    }
+    if width_counts:
+        values = np.array(sorted(width_counts))
+        counts = np.array([width_counts[v] for v in values])
+        hist_counts, edges = np.histogram(values, bins=20, weights=counts)
+        result.update({
+            "width_p50": round(_percentile_from_counts(values, counts, 50), 2),
+            "width_p90": round(_percentile_from_counts(values, counts, 90), 2),
+            "width_p99": round(_percentile_from_counts(values, counts, 99), 2),
+            "width_max": round(float(values[-1]), 2),
+            "width_histogram": {"counts": hist_counts.astype(int).tolist(), "bin_edges": np.round(edges, 3).tolist()}
+        })
+    else:
+        result.update({
+            "width_p50": 0.0, "width_p90": 0.0, "width_p99": 0.0, "width_max": 0.0,
+            "width_histogram": {"counts": [], "bin_edges": []}
+        })
+    return result
+
+
+class OutOfCoreAnalysis:
+    """
+    与 MaskAnalysis 接口对齐的分块分析对象（area_px / length_px / geometric_length_px /
+    avg_width_px / max_width_px / width_profile），首次访问时整体分块计算一次。
+
+    结果只在 halo 明显大于裂缝宽度时与整图一致：auto_halo=True 时若 max_width_px 超过 halo 的一半，
+    把 halo 放大到至少 2 倍最大宽度后重算（直到满足或窗口已覆盖整图），self.halo 为最终使用的值；
+    auto_halo=False 时只打印警告。
+    """
+
+    def __init__(self, mask: np.ndarray, tile_size: int = 2048, halo: int = 64, threshold: int = 127,
+                 auto_halo: bool = True):
+        self.mask = mask
+        self.tile_size = tile_size
+        self.halo = halo
+        self.threshold = threshold
+        self.auto_halo = auto_halo
+
+    @cached_property
+    def totals(self) -> dict:
+        totals = quantify_out_of_core(self.mask, self.tile_size, self.halo, self.threshold)
+        while 2 * totals["max_width_px"] > self.halo and self.halo < max(self.mask.shape[:2]):
+            if not self.auto_halo:
+                print(f"⚠️ 最大宽度 {totals['max_width_px']} px 接近 halo={self.halo}，分块结果可能与整图不一致")
+                break
+            self.halo = max(2 * self.halo, int(np.ceil(2 * totals["max_width_px"])))
+            print(f"⚠️ 最大宽度 {totals['max_width_px']} px 接近 halo，放大为 halo={self.halo} 重算")
+            totals = quantify_out_of_core(self.mask, self.tile_size, self.halo, self.threshold)
+        return totals
+
+    @property
+    def area_px(self) -> int:
+        return self.totals["area_px"]
+
+    @property
+    def length_px(self) -> int:
+        return self.totals["length_px"]
+
+    @property
+    def geometric_length_px(self) -> float:
+        return self.totals["geometric_length_px"]
+
+    @property
+    def avg_width_px(self) -> float:
+        return self.totals["avg_width_px"]
+
+    @property
+    def max_width_px(self) -> float:
+        return self.totals["max_width_px"]
+
+    @property
+    def width_profile(self) -> dict:
+        """与 compute_width_profile_px 相同的分布统计（不含逐点 widths 数组）"""
+        t = self.totals
+        return {"p50": t["width_p50"], "p90": t["width_p90"], "p99": t["width_p99"],
+                "max": t["width_max"], "histogram": t["width_histogram"]}
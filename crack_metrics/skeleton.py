@@ -1,35 +1,148 @@
 import numpy as np
+import cv2
+from scipy import ndimage
+from scipy.spatial import cKDTree
 from skimage.morphology import skeletonize
-from skimage.measure import label, regionprops
-from sklearn.neighbors import KDTree
 from typing import Tuple
-from skimage.morphology import thin, remove_small_objects
+from skimage.morphology import thin
 
+# 可选骨架化后端：skimage（默认）/ opencv（cv2.ximgproc.thinning，需要 opencv-contrib-python，缺失时回退 skimage）
+SKELETON_BACKENDS = ("skimage", "opencv")
 
-def extract_skeleton_and_normals(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+# ROI 裁剪时在非零外接框四周保留的背景边距
+ROI_PAD = 2
+
+# 骨架连通分量（8 邻接）的最小像素数，小于该值的分量视为杂点删除；1 为保留全部（与原实现一致）
+SKELETON_MIN_SIZE = 1
+
+# 法向估计：每个骨架点取半径 NORMAL_RADIUS 内最近的 NORMAL_K 个骨架点做局部 PCA
+NORMAL_RADIUS = 4.0
+NORMAL_K = 12
+
+
+def has_opencv_thinning() -> bool:
+    """当前 cv2 是否带 ximgproc（opencv-contrib-python）"""
+    return hasattr(cv2, "ximgproc")
+
+
+_warned_fallback = False
+
+
+def skeletonize_binary(binary: np.ndarray, backend: str = "skimage") -> np.ndarray:
+    """按后端骨架化 bool 掩膜；opencv 后端不可用时打印一次警告并回退 skimage。"""
+    global _warned_fallback
+    if backend not in SKELETON_BACKENDS:
+        raise ValueError(f"未知骨架化后端: {backend}，可选 {list(SKELETON_BACKENDS)}")
+    if backend == "opencv":
+        if has_opencv_thinning():
+            return cv2.ximgproc.thinning(binary.astype(np.uint8) * 255, thinningType=cv2.ximgproc.THINNING_ZHANGSUEN) > 0
+        if not _warned_fallback:
+            print("⚠️ 未安装 opencv-contrib-python（cv2.ximgproc），骨架化回退到 skimage")
+            _warned_fallback = True
+    return skeletonize(binary)
+
+
+def nonzero_roi(mask: np.ndarray, pad: int = ROI_PAD) -> Tuple[int, int, int, int] | None:
+    """非零像素外接框（四周扩 pad 像素并裁到图像范围内），返回 (x0, y0, x1, y1)；全零时返回 None。"""
+    x, y, w, h = cv2.boundingRect((mask > 0).astype(np.uint8))
+    if w == 0 or h == 0:
+        return None
+    return max(x - pad, 0), max(y - pad, 0), min(x + w + pad, mask.shape[1]), min(y + h + pad, mask.shape[0])
+
+
+def remove_small_components(binary: np.ndarray, min_size: int = SKELETON_MIN_SIZE) -> np.ndarray:
+    """
+    删除像素数小于 min_size 的 8 邻接连通分量（语义同 skimage 旧版 remove_small_objects(min_size, connectivity=2)）。
+    直接标记连通分量按大小过滤，不依赖 skimage 中已弃用的 min_size 参数。
+    """
+    binary = binary > 0
+    if min_size <= 1:
+        return binary
+    labels, _ = ndimage.label(binary, structure=np.ones((3, 3), dtype=bool))
+    sizes = np.bincount(labels.ravel())
+    keep = sizes >= min_size
+    keep[0] = False
+    return keep[labels]
+
+
+def skeleton_normals(
+    points: np.ndarray,
+    radius: float = NORMAL_RADIUS,
+    k: int = NORMAL_K,
+    chunk_size: int = 1 << 16
+) -> np.ndarray:
+    """
+    骨架点单位法向 (N, 2) [nx, ny]：KD 树一次批量取每点的邻域，
+    由邻域协方差的闭式主方向 θ = ½·atan2(2Cxy, Cxx − Cyy) 得到切向，法向为其垂直方向。
+    法向符号统一为 ny >= 0；邻域不足 2 点（孤立点）时为零向量。按 chunk_size 分块以限制内存。
     """
-    使用简洁版骨架化方法（学习自你提供的脚本），结合 thin + remove_small_objects 清理。
+    n = len(points)
+    normals = np.zeros((n, 2), dtype=np.float32)
+    if n < 2:
+        return normals
+
+    tree = cKDTree(points)
+    padded = np.vstack([points, [[0, 0]]]).astype(np.float64)  # 缺失邻居下标为 n，指向占位点
+    k = min(k, n)
+    for start in range(0, n, chunk_size):
+        block = points[start:start + chunk_size]
+        dist, idx = tree.query(block, k=k, distance_upper_bound=radius)
+        w = np.isfinite(dist).astype(np.float64)                 # (B, k)
+        nb = padded[idx]                                         # (B, k, 2)
+        count = w.sum(axis=1)
+        mean = (nb * w[..., None]).sum(axis=1) / np.maximum(count, 1)[:, None]
+        d = (nb - mean[:, None, :]) * w[..., None]
+        cxx = (d[..., 0] ** 2).sum(axis=1)
+        cyy = (d[..., 1] ** 2).sum(axis=1)
+        cxy = (d[..., 0] * d[..., 1]).sum(axis=1)
+        theta = 0.5 * np.arctan2(2 * cxy, cxx - cyy)             # 切向角，(-π/2, π/2]
+        block_normals = np.stack([-np.sin(theta), np.cos(theta)], axis=1)
+        block_normals[count < 2] = 0
+        normals[start:start + len(block)] = block_normals
+    return normals
+
+
+def extract_skeleton_and_normals(
+    mask: np.ndarray,
+    crop: bool = True,
+    with_normals: bool = True,
+    backend: str = "skimage"
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    使用简洁版骨架化方法（学习自你提供的脚本），结合 thin + 小连通分量清理。
     输入：
         mask: 二值掩膜图，背景为 0，裂缝区域为 1
+        crop: 只在非零外接框（含边距）内骨架化，结果映射回全图坐标
+        with_normals: 为 False 时跳过法向估计，normals 返回 None（只需骨架的调用方可省去 KD 树开销）
+        backend: 骨架化后端 skimage / opencv（见 SKELETON_BACKENDS）；opencv 结果与 skimage 不逐像素一致，
+                 默认 skimage 以保持指标不变
     返回：
         skeleton_mask: 骨架二值图（0/1）
         skeleton_points: (N, 2) 骨架点坐标 [x, y]
-        normals: 全为零数组（占位，为接口兼容性保留）
+        normals: (N, 2) 单位法向 [nx, ny]（见 skeleton_normals）
     """
-    # Step 1: 骨架提取（你提供的方法）
-    skeleton = skeletonize(mask > 0)
+    # Step 0: ROI 裁剪（裂缝通常只占图像很小一部分）
+    roi = nonzero_roi(mask) if crop else (0, 0, mask.shape[1], mask.shape[0])
+    skeleton_mask = np.zeros(mask.shape[:2], dtype=np.uint8)
+    if roi is None:
+        normals = np.empty((0, 2), dtype=np.float32) if with_normals else None
+        return skeleton_mask, np.empty((0, 2), dtype=np.int64), normals
+    x0, y0, x1, y1 = roi
+
+    # Step 1: 骨架提取
+    skeleton = skeletonize_binary(mask[y0:y1, x0:x1] > 0, backend)
 
     # Step 2: 可选进一步细化（你参考中使用了 thin）
     skeleton = thin(skeleton)
 
-    # Step 3: 去除小杂点
-    skeleton = remove_small_objects(skeleton, min_size=1)
+    # Step 3: 去除小杂点（8 邻接判定连通，避免对角相连的骨架被当作孤立点删掉而断开）
+    skeleton = remove_small_components(skeleton)
 
-    # Step 4: 提取骨架点
-    ys, xs = np.where(skeleton > 0)
+    # Step 4: 提取骨架点（映射回全图坐标）
+    skeleton_mask[y0:y1, x0:x1] = skeleton
+    ys, xs = np.where(skeleton_mask > 0)
     skeleton_points = np.stack([xs, ys], axis=1)
 
-    # Step 5: 返回值（兼容原函数格式）
-    skeleton_mask = skeleton.astype(np.uint8)
-    normals = np.zeros_like(skeleton_points, dtype=np.float32)  # 占位
-    return skeleton_mask, skeleton_points, normals
\ No newline at end of file
+    # Step 5: 局部 PCA 法向（批量）
+    normals = skeleton_normals(skeleton_points) if with_normals else None
+    return skeleton_mask, skeleton_points, normals
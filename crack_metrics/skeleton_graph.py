@@ -0,0 +1,144 @@
+from functools import cached_property
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components, depth_first_order
+
+# 只取"向前"的 4 个方向，每条边只生成一次：(dy, dx)
+_FORWARD_OFFSETS = [(0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def skeleton_edges(skeleton: np.ndarray) -> tuple:
+    """
+    骨架像素之间的无向边（每条边只出现一次，由"起点"指向其右 / 下方向的邻居）。
+    返回 (points [x, y], 起点下标, 终点下标, 边权)。
+    """
+    skel = skeleton > 0
+    ys, xs = np.nonzero(skel)
+    points = np.stack([xs, ys], axis=1)  # [x, y]，与 extract_skeleton_and_normals 顺序一致
+
+    # 补一圈 0，邻居查找无需判断越界
+    padded = np.pad(skel, 1)
+    index = np.full(padded.shape, -1, dtype=np.int64)
+    index[ys + 1, xs + 1] = np.arange(len(ys))
+
+    rows, cols, weights = [], [], []
+    for dy, dx in _FORWARD_OFFSETS:
+        nb = index[ys + 1 + dy, xs + 1 + dx]
+        keep = nb >= 0
+        if dy and dx:
+            # 对角边：两个公共 4 邻接像素任一存在即跳过
+            keep &= ~(padded[ys + 1, xs + 1 + dx] | padded[ys + 1 + dy, xs + 1])
+        src = np.nonzero(keep)[0]
+        rows.append(src)
+        cols.append(nb[keep])
+        weights.append(np.full(len(src), np.sqrt(2.0) if dy and dx else 1.0))
+    return points, np.concatenate(rows), np.concatenate(cols), np.concatenate(weights)
+
+
+class SkeletonGraph:
+    """
+    骨架图模型：骨架像素为节点，8 邻接像素之间连边（水平 / 竖直权重 1，对角 √2），
+    存为对称稀疏邻接矩阵。若对角两像素已经通过一个公共的 4 邻接像素相连，则去掉该对角边，
+    避免拐角处形成三角形重复计长。
+
+    节点度数 1 为端点，>= 3 为交叉点；删除交叉点后的连通分量即为分支（两个端点 / 交叉点之间的链）。
+    总长、分支长度与分支数在首次访问时计算并缓存，之后为 O(1) 查询。
+    """
+
+    def __init__(self, skeleton: np.ndarray):
+        self.shape = skeleton.shape
+        self.points, r, c, w = skeleton_edges(skeleton)
+        n = len(self.points)
+        self.adjacency = sparse.csr_matrix(
+            (np.concatenate([w, w]), (np.concatenate([r, c]), np.concatenate([c, r]))), shape=(n, n)
+        )
+
+    @cached_property
+    def degree(self) -> np.ndarray:
+        return np.diff(self.adjacency.indptr)
+
+    @cached_property
+    def endpoints(self) -> np.ndarray:
+        """端点坐标 (K, 2) [x, y]"""
+        return self.points[self.degree == 1]
+
+    @cached_property
+    def junctions(self) -> np.ndarray:
+        """交叉点像素坐标 (K, 2) [x, y]；相邻的交叉点像素属于同一个交叉点簇"""
+        return self.points[self.degree >= 3]
+
+    @cached_property
+    def junction_count(self) -> int:
+        """交叉点簇数量"""
+        is_junction = self.degree >= 3
+        if not is_junction.any():
+            return 0
+        sub = self.adjacency[is_junction][:, is_junction]
+        return int(connected_components(sub, directed=False)[0])
+
+    @cached_property
+    def total_length(self) -> float:
+        """骨架几何总长（像素）：所有边权之和"""
+        return float(self.adjacency.sum() / 2)
+
+    @cached_property
+    def _branches(self) -> tuple:
+        """
+        删除交叉点后求连通分量，每个分量为一条分支。
+        分支长度 = 分量内部边权 + 与相邻交叉点相连的边权；交叉点之间直接相连的边不归入任何分支。
+        返回 (每个节点的分支编号，交叉点为 -1；分支长度数组)
+        """
+        n = len(self.points)
+        labels = np.full(n, -1, dtype=np.int64)
+        chain = np.nonzero(self.degree < 3)[0]
+        if len(chain) == 0:
+            return labels, np.zeros(0)
+
+        n_branches, chain_labels = connected_components(self.adjacency[chain][:, chain], directed=False)
+        labels[chain] = chain_labels
+
+        coo = sparse.triu(self.adjacency).tocoo()
+        lr, lc = labels[coo.row], labels[coo.col]
+        owner = np.where(lr >= 0, lr, lc)  # 链-链边两端同属一个分支；链-交叉点边归链所在分支
+        on_branch = owner >= 0
+        lengths = np.bincount(owner[on_branch], weights=coo.data[on_branch], minlength=n_branches)
+        return labels, lengths
+
+    @property
+    def branch_count(self) -> int:
+        return len(self._branches[1])
+
+    @property
+    def branch_lengths(self) -> np.ndarray:
+        """每条分支的几何长度（像素）"""
+        return self._branches[1]
+
+    def branch_polyline(self, branch_id: int) -> np.ndarray:
+        """
+        按走向排列的分支折线 (K, 2) [x, y]，两端包含与之相连的交叉点像素。
+        """
+        labels = self._branches[0]
+        members = np.nonzero(labels == branch_id)[0]
+        if len(members) == 0:
+            raise IndexError(f"分支不存在: {branch_id}")
+
+        # 分支成员 + 直接相连的交叉点
+        touching = np.unique(self.adjacency[members].indices)
+        nodes = np.union1d(members, touching[labels[touching] < 0])
+        sub = self.adjacency[nodes][:, nodes]
+        sub_deg = np.diff(sub.indptr)
+
+        # 从端点（子图内度数 1）出发深度优先遍历；闭环则任取一点
+        starts = np.nonzero(sub_deg == 1)[0]
+        start = int(starts[0]) if len(starts) else 0
+        order = depth_first_order(sub, start, directed=False, return_predecessors=False)
+        return self.points[nodes[order]]
+
+    def summary(self) -> dict:
+        return {
+            "total_length_px": round(self.total_length, 2),
+            "branch_count": self.branch_count,
+            "endpoint_count": len(self.endpoints),
+            "junction_count": self.junction_count
+        }
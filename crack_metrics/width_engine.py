@@ -0,0 +1,64 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+# 每个骨架点取的候选轮廓点数：在候选中按 (距离², y, x) 选出最近两个，并列取舍与点序 / KD 树结构无关
+TIE_CANDIDATES = 8
+
+
+def max_width_from_points(
+    skeleton_points: np.ndarray,
+    contour_points: np.ndarray,
+    tree: cKDTree | None = None,
+    workers: int = 1
+) -> tuple[float, np.ndarray | None, tuple | None]:
+    """
+    向量化最大宽度：所有骨架点一次性在轮廓 KD 树上查询最近邻，
+    宽度取两个最近轮廓点之间的距离，整体 argmax 得到最大值。
+    等距的轮廓点按 (y, x) 取舍，结果不随轮廓点顺序变化（分块计算与整图一致）。
+    输入：
+        skeleton_points: (N, 2) 骨架点 [x, y]
+        contour_points: (M, 2) 轮廓点 [x, y]
+        tree: 可选，已构建的轮廓 KD 树
+        workers: cKDTree.query 的并行线程数（-1 为全部核）
+    返回：
+        max_width: 最大宽度（像素，未取整）
+        location: 最大宽度所在骨架点 [x, y]，无有效宽度时为 None
+        pair: 对应的两个轮廓点 (p1, p2)，无有效宽度时为 None
+    """
+    if len(skeleton_points) == 0 or len(contour_points) == 0:
+        return 0.0, None, None
+    if tree is None:
+        tree = cKDTree(contour_points)
+
+    m = len(contour_points)
+    _, idxs = tree.query(skeleton_points, k=min(TIE_CANDIDATES, max(m, 2)), workers=workers)
+    # 轮廓点不足两个时 cKDTree 以 M 作为缺失邻居的下标
+    valid = idxs[:, 1] < m
+    if not valid.any():
+        return 0.0, None, None
+
+    # 候选按 (整数距离², y, x) 排序后取前两个；缺失邻居距离记为无穷大排在最后
+    idxs = idxs[valid]
+    padded = np.vstack([contour_points, [[0, 0]]]).astype(np.int64)
+    cand = padded[idxs]                                                    # (N, k, 2)
+    d2 = ((cand - skeleton_points[valid][:, None, :].astype(np.int64)) ** 2).sum(axis=2).astype(np.float64)
+    d2[idxs >= m] = np.inf
+    order = np.lexsort((cand[..., 0], cand[..., 1], d2), axis=-1)[:, :2]
+    nearest = np.take_along_axis(cand, order[..., None], axis=1)
+    p1, p2 = nearest[:, 0], nearest[:, 1]
+    widths = np.linalg.norm((p1 - p2).astype(np.float64), axis=1)
+
+    best = int(np.argmax(widths))  # 并列时取第一个，与逐点循环一致
+    if widths[best] <= 0:
+        return 0.0, None, None
+    location = skeleton_points[valid][best]
+    return float(widths[best]), location, (p1[best], p2[best])
+
+
+def widths_from_distance(distance_map: np.ndarray, skeleton: np.ndarray) -> np.ndarray:
+    """
+    在每个骨架像素处采样欧氏距离变换，得到沿骨架的宽度数组（像素，与骨架点 row-major 顺序一致）。
+    距离变换给出中心像素到最近背景像素的距离 d，宽度取 2d - 1（奇数宽度的直条带恰好还原为像素宽度），下限为 1。
+    """
+    d = distance_map[skeleton > 0].astype(np.float64)
+    return np.maximum(2.0 * d - 1.0, 1.0)
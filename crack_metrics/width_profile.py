@@ -0,0 +1,29 @@
+import numpy as np
+from .analysis import MaskAnalysis
+
+
+def summarize_widths(widths: np.ndarray, bins: int = 20) -> dict:
+    """
+    宽度数组 → 分布统计：p50 / p90 / p99 / max（像素）及直方图。
+    """
+    if len(widths) == 0:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0, "histogram": {"counts": [], "bin_edges": []}}
+
+    p50, p90, p99 = np.percentile(widths, [50, 90, 99])
+    counts, edges = np.histogram(widths, bins=bins)
+    return {
+        "p50": round(float(p50), 2),
+        "p90": round(float(p90), 2),
+        "p99": round(float(p99), 2),
+        "max": round(float(widths.max()), 2),
+        "histogram": {"counts": counts.tolist(), "bin_edges": np.round(edges, 3).tolist()}
+    }
+
+
+def compute_width_profile_px(mask: np.ndarray, analysis: MaskAnalysis | None = None, bins: int = 20) -> dict:
+    """
+    基于距离变换的宽度剖面（单位：像素）：在每个骨架像素处采样距离变换得到宽度数组，
+    返回 {"widths": 数组, "p50", "p90", "p99", "max", "histogram"}。
+    """
+    analysis = analysis or MaskAnalysis.from_binary(mask)
+    return {"widths": analysis.widths, **summarize_widths(analysis.widths, bins)}
@@ -8,6 +8,7 @@ from agent.visualize_tools import visualize_crack_result
 from agent.gpt_intent_parser import generate_composite_plan
 from agent.object_memory_manager import ObjectMemoryManager
 from agent.session_manager import SessionManager
+from utils.mask_cache import get_mask_cache, mask_digest
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -67,6 +68,7 @@ if __name__ == "__main__":
         if user_input.strip().lower() in {"exit", "quit"}:
             session.export_memory_snapshot()
             session.print_summary()
+            print(f"🗂️ 掩膜缓存统计: {get_mask_cache().report()}")
             break
 
         logger.log_user(user_input)
@@ -128,18 +130,7 @@ if __name__ == "__main__":
                 mask_path = os.path.join("outputs/masks", mask_name)
 
                 if action == "segment":
-                    if os.path.exists(mask_path):
-                        print(f"♻️ 掩膜已存在，跳过 segment: {mask_path}")
-                        results.append({
-                            "tool": "segment_crack_image",
-                            "status": "success",
-                            "summary": "掩膜已存在于磁盘，跳过执行",
-                            "outputs": {"mask_path": mask_path},
-                            "visualizations": None,
-                            "args": {"image_path": img_path},
-                            "subject": name
-                        })
-                        continue
+                    # 掩膜缓存由分割工具自己查询 / 写入（use_cache 默认开启），这里不再预查，避免重复哈希与重复计数
                     tool_plan.append({
                         "tool": "segment_crack_image",
                         "args": {"image_path": img_path},
@@ -147,9 +138,11 @@ if __name__ == "__main__":
                     })
 
                 elif action == "quantify":
-                    if memory.has_metrics(name, metrics, pixel_size):
+                    # 掩膜内容哈希命中像素指标缓存时，任意 pixel_size 都只需换算
+                    mask_hash = mask_digest(mask_path) if os.path.exists(mask_path) else None
+                    if memory.has_metrics(name, metrics, pixel_size, mask_hash):
                         print(f"✅ 图像 {name} 的指标已存在于 memory，使用缓存结果。")
-                        metric_values = memory.get_metrics_by_name(name, pixel_size)
+                        metric_values = memory.get_metrics_by_name(name, pixel_size, mask_hash)
                         outputs = {k: v for k, v in metric_values.items() if any(map(lambda m: m.lower() in k.lower(), metrics))}
                         results.append({
                             "tool": "quantify_crack_metrics",
@@ -237,6 +230,8 @@ if __name__ == "__main__":
             results=results,
             plan=tool_plan
         )
+        # 内部缓存数据（像素指标、掩膜哈希）已写入 memory，不进入日志与 LLM 总结
+        results = [{k: v for k, v in r.items() if k != "cache"} for r in results]
 
         logger.log_agent_structured({
             "intent": "multi_step",
@@ -0,0 +1,47 @@
+import os
+import numpy as np
+import torch
+
+
+class TorchScriptBackend:
+    """
+    TorchScript 推理后端：加载 torch.jit 导出的模型，调用方式与 nn.Module 一致（输入/输出均为 logits 张量）。
+    """
+
+    def __init__(self, model_path: str, device: torch.device = torch.device("cpu")):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"TorchScript model not found: {model_path}")
+        self.device = device
+        self.module = torch.jit.load(model_path, map_location=device)
+        self.module.eval()
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        with torch.no_grad():
+            return self.module(batch.to(self.device))
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime CPU 推理后端：固定线程数，调用方式与 nn.Module 一致（输入/输出均为 logits 张量）。
+    """
+
+    def __init__(self, model_path: str, num_threads: int = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX 后端需要安装 onnxruntime：pip install onnxruntime") from e
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found: {model_path}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        inputs = np.ascontiguousarray(batch.detach().cpu().numpy(), dtype=np.float32)
+        logits = self.session.run(None, {self.input_name: inputs})[0]
+        return torch.from_numpy(logits)
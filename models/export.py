@@ -0,0 +1,146 @@
+import os
+import argparse
+import json
+import numpy as np
+import torch
+
+from models.unet import UNet
+
+
+def artifact_path(checkpoint_path: str, fmt: str) -> str:
+    """
+    根据 checkpoint 路径推导导出文件路径：
+        checkpoints/unet_best.pth → checkpoints/unet_best.onnx / .ts.pt / .int8.pt
+    """
+    base, _ = os.path.splitext(checkpoint_path)
+    suffix = {"onnx": ".onnx", "torchscript": ".ts.pt", "int8": ".int8.pt"}
+    if fmt not in suffix:
+        raise ValueError(f"未知导出格式: {fmt}")
+    return base + suffix[fmt]
+
+
+def load_eager_model(checkpoint_path: str) -> torch.nn.Module:
+    model = UNet(in_channels=3, num_classes=1)
+    model.load_state_dict(torch.load(checkpoint_path, map_location="cpu"))
+    model.eval()
+    return model
+
+
+def export_torchscript(checkpoint_path: str, output_path: str = None, input_size: int = 896) -> str:
+    """
+    将 checkpoint 通过 torch.jit.trace 导出为 TorchScript。
+    """
+    output_path = output_path or artifact_path(checkpoint_path, "torchscript")
+    model = load_eager_model(checkpoint_path)
+    example = torch.rand(1, 3, input_size, input_size)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    traced = torch.jit.freeze(traced)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    traced.save(output_path)
+    return output_path
+
+
+def export_onnx(checkpoint_path: str, output_path: str = None, input_size: int = 896, opset: int = 17) -> str:
+    """
+    将 checkpoint 导出为 ONNX，batch / 高 / 宽为动态维度（高宽需为 16 的倍数）。
+    """
+    output_path = output_path or artifact_path(checkpoint_path, "onnx")
+    model = load_eager_model(checkpoint_path)
+    example = torch.rand(1, 3, input_size, input_size)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    torch.onnx.export(
+        model,
+        (example,),
+        output_path,
+        input_names=["image"],
+        output_names=["logits"],
+        dynamic_axes={"image": {0: "batch", 2: "height", 3: "width"},
+                      "logits": {0: "batch", 2: "height", 3: "width"}},
+        opset_version=opset,
+        do_constant_folding=True,
+        dynamo=False
+    )
+    return output_path
+
+
+def check_parity(
+    checkpoint_path: str,
+    backend: torch.nn.Module,
+    image_paths: list = None,
+    input_size: int = 896,
+    threshold: float = 0.9,
+    prob_tolerance: float = 1e-3,
+    mask_tolerance: float = 1e-4
+) -> dict:
+    """
+    对比导出模型与 eager 模型：逐图计算概率最大绝对误差与掩膜不一致像素比例，两项均在容差内才算通过。
+    backend 为任意可调用对象（输入/输出 logits 张量），如 OnnxBackend / TorchScriptBackend。
+    未提供 image_paths 时使用随机输入。
+    """
+    import cv2
+    from task_tools.segment import preprocess_image
+
+    eager = load_eager_model(checkpoint_path)
+    if image_paths:
+        inputs = []
+        for p in image_paths:
+            image_np = cv2.imread(p)
+            if image_np is None:
+                raise FileNotFoundError(f"Image not found: {p}")
+            inputs.append((p, preprocess_image(image_np).unsqueeze(0)))
+    else:
+        torch.manual_seed(0)
+        inputs = [("random", torch.rand(1, 3, input_size, input_size))]
+
+    per_image = []
+    for name, x in inputs:
+        with torch.no_grad():
+            ref = torch.sigmoid(eager(x))[0, 0].numpy()
+            out = torch.sigmoid(backend(x))[0, 0].cpu().numpy()
+        max_diff = float(np.abs(ref - out).max())
+        mismatch = float(np.mean((ref > threshold) != (out > threshold)))
+        per_image.append({
+            "image": name,
+            "max_prob_diff": max_diff,
+            "mask_mismatch_ratio": mismatch,
+            "passed": max_diff <= prob_tolerance and mismatch <= mask_tolerance
+        })
+
+    return {
+        "passed": all(r["passed"] for r in per_image),
+        "prob_tolerance": prob_tolerance,
+        "mask_tolerance": mask_tolerance,
+        "images": per_image
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出裂缝 UNet 为 TorchScript / ONNX，并做一致性校验")
+    parser.add_argument("--checkpoint", default="checkpoints/unet_best.pth")
+    parser.add_argument("--formats", nargs="+", default=["torchscript", "onnx"], choices=["torchscript", "onnx"])
+    parser.add_argument("--input-size", type=int, default=896)
+    parser.add_argument("--parity-images", nargs="*", default=None, help="用于一致性校验的图像，缺省使用随机输入")
+    parser.add_argument("--num-threads", type=int, default=None)
+    args = parser.parse_args()
+
+    from models.backends import OnnxBackend, TorchScriptBackend
+
+    report = {}
+    for fmt in args.formats:
+        if fmt == "torchscript":
+            path = export_torchscript(args.checkpoint, input_size=args.input_size)
+            backend = TorchScriptBackend(path)
+        else:
+            path = export_onnx(args.checkpoint, input_size=args.input_size)
+            backend = OnnxBackend(path, num_threads=args.num_threads)
+        print(f"✅ 已导出 {fmt}: {path}")
+        report[fmt] = {"path": path, "parity": check_parity(args.checkpoint, backend, args.parity_images, args.input_size)}
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not all(r["parity"]["passed"] for r in report.values()):
+        raise SystemExit("❌ 导出模型与 eager 模型输出不一致，超出容差")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from models.unet import DoubleConv
+
+
+class ChannelsLastModel(nn.Module):
+    """
+    包装器：将输入转换为 channels_last 后再送入（已转换为 channels_last 的）模型。
+    """
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        return self.model(x.contiguous(memory_format=torch.channels_last))
+
+
+def fold_batchnorm(model: nn.Module) -> nn.Module:
+    """
+    将每个 DoubleConv 中的 BatchNorm 折叠进前一个卷积（模型需处于 eval 模式），BN 位置替换为 Identity。
+    """
+    for module in model.modules():
+        if isinstance(module, DoubleConv):
+            seq = module.conv
+            for conv_idx, bn_idx in ((0, 1), (3, 4)):
+                if isinstance(seq[bn_idx], nn.BatchNorm2d):
+                    seq[conv_idx] = fuse_conv_bn_eval(seq[conv_idx], seq[bn_idx])
+                    seq[bn_idx] = nn.Identity()
+    return model
+
+
+def optimize_for_inference(model: nn.Module, num_threads: int = None) -> nn.Module:
+    """
+    推理图优化：BN 折叠 → channels_last → 显式设置 intra-op 线程数。
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    model.eval()
+    fold_batchnorm(model)
+    model = model.to(memory_format=torch.channels_last)
+    return ChannelsLastModel(model).eval()
+
+
+def measure_latency(model: nn.Module, input_size: int = 896, steady_runs: int = 3, device: torch.device = torch.device("cpu")) -> dict:
+    """
+    预热并测量延迟：第一次前向（含惰性初始化）为首请求延迟，其后 steady_runs 次的中位数为稳态延迟。
+    """
+    x = torch.rand(1, 3, input_size, input_size, device=device)
+    with torch.inference_mode():
+        t0 = time.perf_counter()
+        model(x)
+        first = time.perf_counter() - t0
+
+        times = []
+        for _ in range(steady_runs):
+            t0 = time.perf_counter()
+            model(x)
+            times.append(time.perf_counter() - t0)
+
+    return {
+        "first_request_latency_s": round(first, 4),
+        "steady_state_latency_s": round(float(np.median(times)), 4) if times else None,
+        "num_threads": torch.get_num_threads()
+    }
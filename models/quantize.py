@@ -0,0 +1,134 @@
+import os
+import time
+import argparse
+import json
+import numpy as np
+import torch
+from torch.ao.quantization import fuse_modules, get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+from models.unet import DoubleConv
+from models.export import artifact_path, load_eager_model
+
+
+def fuse_conv_bn_relu(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    将每个 DoubleConv 中的两组 Conv-BN-ReLU 融合为单个 ConvReLU2d（模型需处于 eval 模式）。
+    """
+    for module in model.modules():
+        if isinstance(module, DoubleConv):
+            fuse_modules(module.conv, [["0", "1", "2"], ["3", "4", "5"]], inplace=True)
+    return model
+
+
+def _load_calibration_batches(image_paths: list) -> list:
+    import cv2
+    from task_tools.segment import preprocess_image
+
+    batches = []
+    for p in image_paths:
+        image_np = cv2.imread(p)
+        if image_np is None:
+            raise FileNotFoundError(f"Image not found: {p}")
+        batches.append(preprocess_image(image_np).unsqueeze(0))
+    return batches
+
+
+def quantize_int8(checkpoint_path: str, calibration_images: list, engine: str = "x86") -> torch.nn.Module:
+    """
+    训练后静态 INT8 量化：融合 Conv-BN-ReLU → FX 插入观测器 → 在样本图像上校准 → 转换为量化模型。
+    """
+    if engine not in torch.backends.quantized.supported_engines:
+        engine = "fbgemm" if "fbgemm" in torch.backends.quantized.supported_engines else "qnnpack"
+    torch.backends.quantized.engine = engine
+
+    model = fuse_conv_bn_relu(load_eager_model(checkpoint_path))
+    batches = _load_calibration_batches(calibration_images)
+    if not batches:
+        raise ValueError("至少需要一张校准图像")
+
+    prepared = prepare_fx(model, get_default_qconfig_mapping(engine), example_inputs=(batches[0],))
+    with torch.no_grad():
+        for x in batches:
+            prepared(x)
+    return convert_fx(prepared)
+
+
+def save_quantized(model: torch.nn.Module, output_path: str, input_size: int = 896) -> str:
+    """
+    以 TorchScript 形式保存量化模型，供 task_tools.segment.load_backend("int8") 加载。
+    """
+    example = torch.rand(1, 3, input_size, input_size)
+    with torch.no_grad():
+        traced = torch.jit.freeze(torch.jit.trace(model, example))
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    traced.save(output_path)
+    return output_path
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> float:
+    union = np.logical_or(a, b).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(a, b).sum() / union)
+
+
+def compare_with_fp32(checkpoint_path: str, quantized: torch.nn.Module, image_paths: list, threshold: float = 0.9) -> dict:
+    """
+    逐图比较 INT8 与 FP32 掩膜的 IoU 及单图推理耗时，用于评估是否值得部署量化模型。
+    """
+    fp32 = load_eager_model(checkpoint_path)
+    per_image = []
+    fp32_times, int8_times = [], []
+    batches = _load_calibration_batches(image_paths)
+    if batches:
+        # 预热一次，避免首轮的惰性初始化计入耗时
+        with torch.no_grad():
+            fp32(batches[0])
+            quantized(batches[0])
+    for path, x in zip(image_paths, batches):
+        with torch.no_grad():
+            t0 = time.perf_counter()
+            ref = torch.sigmoid(fp32(x))[0, 0].numpy() > threshold
+            t1 = time.perf_counter()
+            out = torch.sigmoid(quantized(x))[0, 0].numpy() > threshold
+            t2 = time.perf_counter()
+        fp32_times.append(t1 - t0)
+        int8_times.append(t2 - t1)
+        per_image.append({"image": path, "iou_vs_fp32": round(_iou(ref, out), 4)})
+
+    mean_iou = float(np.mean([r["iou_vs_fp32"] for r in per_image])) if per_image else 0.0
+    return {
+        "mean_iou_vs_fp32": round(mean_iou, 4),
+        "iou_drop": round(1.0 - mean_iou, 4),
+        "fp32_latency_s": round(float(np.mean(fp32_times)), 4) if fp32_times else None,
+        "int8_latency_s": round(float(np.mean(int8_times)), 4) if int8_times else None,
+        "speedup": round(float(np.mean(fp32_times) / np.mean(int8_times)), 2) if int8_times else None,
+        "images": per_image
+    }
+
+
+def main():
+    from utils.path_utils import get_test_image_paths
+
+    parser = argparse.ArgumentParser(description="UNet 训练后静态 INT8 量化（CPU）")
+    parser.add_argument("--checkpoint", default="checkpoints/unet_best.pth")
+    parser.add_argument("--num-calib", type=int, default=5, help="从 data/Test_images 中取前 N 张作为校准集")
+    parser.add_argument("--input-size", type=int, default=896)
+    parser.add_argument("--engine", default="x86")
+    args = parser.parse_args()
+
+    images = get_test_image_paths()
+    calib = images[:args.num_calib]
+    evaluation = images[args.num_calib:] or calib
+
+    quantized = quantize_int8(args.checkpoint, calib, engine=args.engine)
+    path = save_quantized(quantized, artifact_path(args.checkpoint, "int8"), input_size=args.input_size)
+    print(f"✅ 已保存 INT8 模型: {path}")
+
+    report = compare_with_fp32(args.checkpoint, quantized, evaluation)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
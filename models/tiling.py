@@ -0,0 +1,105 @@
+import numpy as np
+import torch
+
+
+def _tile_starts(length: int, tile: int, stride: int) -> list:
+    """
+    沿一个维度计算滑窗起点，保证最后一个窗口贴齐边界。
+    """
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile + 1, stride))
+    if starts[-1] != length - tile:
+        starts.append(length - tile)
+    return starts
+
+
+def _blend_window(tile: int, overlap: int) -> np.ndarray:
+    """
+    生成 (tile, tile) 的融合权重：中心为 1，重叠区线性衰减，边缘保留一个小的正权重。
+    """
+    w = np.ones(tile, dtype=np.float32)
+    if overlap > 0:
+        ramp = np.arange(1, overlap + 1, dtype=np.float32) / (overlap + 1)
+        w[:overlap] = ramp
+        w[-overlap:] = ramp[::-1]
+    return np.outer(w, w)
+
+
+def sliding_window_predict(
+    model: torch.nn.Module,
+    image_rgb: np.ndarray,
+    tile_size: int = 896,
+    overlap: int = 128,
+    batch_size: int = 4,
+    device: torch.device = torch.device("cpu"),
+    threshold: float = None
+) -> np.ndarray:
+    """
+    原分辨率滑窗推理：将图像切成重叠 tile，按行分批推理，并用线性权重融合重叠区域。
+
+    输入：
+        image_rgb: (H, W, 3) uint8 RGB 图像
+        tile_size: tile 边长，必须为 16 的倍数（UNet 有 4 次下采样）
+        overlap: 相邻 tile 的重叠像素数
+        threshold: 若给定，则直接返回 0/1 uint8 掩膜，否则返回 float32 概率图
+    返回：
+        (H, W) 概率图或掩膜
+
+    内存说明：网络激活只按 batch_size 个 tile 计算；融合累加器只保留当前一行 tile 覆盖的
+    条带 (tile_size, W)，已完成的行立即写入输出，因此峰值内存由 tile 大小决定。
+    """
+    if tile_size % 16 != 0:
+        raise ValueError(f"tile_size 必须为 16 的倍数，当前为 {tile_size}")
+    if not 0 <= overlap < tile_size:
+        raise ValueError(f"overlap 必须在 [0, tile_size) 范围内，当前为 {overlap}")
+
+    h, w = image_rgb.shape[:2]
+    # 小于 tile 的图像先做反射填充
+    pad_h, pad_w = max(tile_size - h, 0), max(tile_size - w, 0)
+    if pad_h or pad_w:
+        image_rgb = np.pad(image_rgb, ((0, pad_h), (0, pad_w), (0, 0)), mode="reflect")
+    ph, pw = image_rgb.shape[:2]
+
+    stride = tile_size - overlap
+    ys = _tile_starts(ph, tile_size, stride)
+    xs = _tile_starts(pw, tile_size, stride)
+    window = _blend_window(tile_size, overlap)
+
+    out_dtype = np.uint8 if threshold is not None else np.float32
+    output = np.zeros((ph, pw), dtype=out_dtype)
+
+    # 当前条带覆盖 [top, top + tile_size) 行
+    top = ys[0]
+    acc = np.zeros((tile_size, pw), dtype=np.float32)
+    wsum = np.zeros((tile_size, pw), dtype=np.float32)
+
+    for row, y0 in enumerate(ys):
+        # 1. 本行所有 tile 分批推理并累加
+        for start in range(0, len(xs), batch_size):
+            chunk = xs[start:start + batch_size]
+            tiles = np.stack([image_rgb[y0:y0 + tile_size, x0:x0 + tile_size] for x0 in chunk])
+            batch = torch.from_numpy(tiles).permute(0, 3, 1, 2).float().div_(255.0).to(device)
+            with torch.inference_mode():
+                probs = torch.sigmoid(model(batch))[:, 0].cpu().numpy()
+            r0 = y0 - top
+            for x0, prob in zip(chunk, probs):
+                acc[r0:r0 + tile_size, x0:x0 + tile_size] += prob * window
+                wsum[r0:r0 + tile_size, x0:x0 + tile_size] += window
+
+        # 2. 下一行 tile 不再覆盖的行已完成，写入输出并平移条带
+        next_top = ys[row + 1] if row + 1 < len(ys) else top + tile_size
+        done = next_top - top
+        blended = acc[:done] / np.maximum(wsum[:done], 1e-6)
+        if threshold is not None:
+            output[top:next_top] = blended > threshold
+        else:
+            output[top:next_top] = blended
+
+        acc[:tile_size - done] = acc[done:]
+        wsum[:tile_size - done] = wsum[done:]
+        acc[tile_size - done:] = 0
+        wsum[tile_size - done:] = 0
+        top = next_top
+
+    return output[:h, :w]
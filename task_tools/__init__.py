@@ -1,13 +1,26 @@
 from .compare import compare_results_csv
 from .plot import plot_comparison_graphs
 from .registry import tool, tool_registry
-from .segment import segment_crack_image
+from .segment import segment_crack_image, segment_crack_images
+from .pipeline import segment_crack_directory
+from .parallel_segment import segment_crack_images_parallel
+from .prescreen import segment_crack_images_two_stage
+from .video_segment import segment_crack_video
+from .rethreshold import rethreshold_masks
 from .quantify import quantify_crack_metrics, generate_crack_visuals
+from .bulk_quantify import quantify_crack_directory
 from .advice import summarize_and_advice
 
 __all__ = [
     "segment_crack_image",
+    "segment_crack_images",
+    "segment_crack_directory",
+    "segment_crack_images_parallel",
+    "segment_crack_images_two_stage",
+    "segment_crack_video",
+    "rethreshold_masks",
     "quantify_crack_metrics",
+    "quantify_crack_directory",
     "generate_crack_visuals",
     "compare_results_csv",
     "plot_comparison_graphs",
@@ -0,0 +1,109 @@
+import os
+import glob
+import json
+import time
+import argparse
+import traceback
+
+from task_tools.registry import tool
+
+from crack_metrics.metric_table import quantify_masks
+from utils.io_utils import upsert_rows
+from utils.path_utils import list_image_paths
+
+
+def resolve_mask_paths(mask_dir: str | None = None, pattern: str | None = None) -> list:
+    """目录（按文件名排序的 png/jpg）或 glob 模式 → 掩膜路径列表。"""
+    if pattern:
+        return sorted(glob.glob(pattern, recursive=True), key=lambda p: os.path.basename(p))
+    if mask_dir:
+        return list_image_paths(mask_dir)
+    raise ValueError("mask_dir 与 pattern 至少提供一个")
+
+
+@tool(name="quantify_crack_directory")
+def quantify_crack_directory(
+    mask_dir: str = "outputs/masks",
+    pixel_size_mm: float = 0.5,
+    pattern: str | None = None,
+    metrics: list | None = None,
+    num_workers: int = 0,
+    chunk_size: int = 32,
+    csv_path: str = "outputs/csv/predicted_metrics.csv"
+) -> dict:
+    """
+    目录 / glob 批量量化工具：进程池分块计算，结果汇总为一个 DataFrame，最后一次性写入 CSV
+    （与 quantify_crack_metrics 写同一张表，同名图像覆盖）。数值与逐图工具完全一致。
+    """
+    try:
+        mask_paths = resolve_mask_paths(mask_dir if not pattern else None, pattern)
+        if not mask_paths:
+            raise FileNotFoundError(f"未找到掩膜: {pattern or mask_dir}")
+
+        t0 = time.perf_counter()
+        df, errors = quantify_masks(mask_paths, pixel_size_mm, metrics, num_workers, chunk_size)
+        elapsed = time.perf_counter() - t0
+        if not df.empty:
+            upsert_rows(csv_path, df)
+
+        n_ok = len(df)
+        return {
+            "status": "success" if n_ok == len(mask_paths) else ("partial" if n_ok else "error"),
+            "summary": f"批量量化完成：{n_ok}/{len(mask_paths)} 张，耗时 {elapsed:.2f}s",
+            "outputs": {
+                "csv_path": csv_path if n_ok else None,
+                "count": n_ok,
+                "errors": errors
+            },
+            "visualizations": None,
+            "error": None
+        }
+
+    except Exception as e:
+        print("[ERROR] quantify_crack_directory 异常:", str(e))
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "summary": "批量量化失败",
+            "outputs": None,
+            "visualizations": None,
+            "error": str(e)
+        }
+
+
+def scaling_report(mask_paths: list, worker_counts: list, pixel_size_mm: float = 0.5, chunk_size: int = 32) -> list:
+    """批量量化吞吐随进程数的扩展（含进程启动开销）。"""
+    rows = []
+    base = None
+    for n in worker_counts:
+        t0 = time.perf_counter()
+        quantify_masks(mask_paths, pixel_size_mm, num_workers=n, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - t0
+        mps = len(mask_paths) / elapsed if elapsed > 0 else 0.0
+        base = base or mps
+        rows.append({
+            "workers": n,
+            "masks": len(mask_paths),
+            "total_s": round(elapsed, 3),
+            "masks_per_s": round(mps, 2),
+            "speedup": round(mps / base, 2) if base else None
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量量化吞吐扩展测试")
+    parser.add_argument("--mask-dir", default="outputs/masks")
+    parser.add_argument("--pattern", default=None)
+    parser.add_argument("--pixel-size", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=32)
+    args = parser.parse_args()
+
+    paths = resolve_mask_paths(args.mask_dir if not args.pattern else None, args.pattern)
+    rows = scaling_report(paths, args.workers, args.pixel_size, args.chunk_size)
+    print(json.dumps(rows, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import time
+import json
+import argparse
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+from task_tools.registry import tool
+
+# 每个 worker 进程内的模型（由 _init_worker 加载一次）
+_worker_model = None
+
+
+def _cpu_slots(num_workers: int, threads_per_worker: int) -> list:
+    """
+    把可用 CPU 核切分给各 worker（每个 worker threads_per_worker 个核）；核数不够时循环复用。
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    slots = []
+    for w in range(num_workers):
+        start = (w * threads_per_worker) % len(cores)
+        slots.append([cores[(start + k) % len(cores)] for k in range(min(threads_per_worker, len(cores)))])
+    return slots
+
+
+def _init_worker(checkpoint_path: str, backend: str, threads_per_worker: int, slots: list, counter):
+    global _worker_model
+    import torch
+    from task_tools.segment import load_backend
+
+    with counter.get_lock():
+        worker_id = counter.value
+        counter.value += 1
+
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, slots[worker_id % len(slots)])
+        except OSError:
+            pass
+    torch.set_num_threads(threads_per_worker)
+    torch.set_num_interop_threads(1)
+    _worker_model = load_backend(backend, checkpoint_path)
+
+
+def _segment_shard(image_paths: list) -> list:
+    """在 worker 中对一个分片做一次批量推理并写出掩膜。"""
+    import cv2
+    import torch
+    from task_tools.segment import preprocess_image, predict_probabilities, save_mask
+
+    results, valid = [None] * len(image_paths), []
+    for i, path in enumerate(image_paths):
+        image_np = cv2.imread(path)
+        if image_np is None:
+            results[i] = {"image_path": path, "status": "error", "mask_path": None, "error": f"Image not found: {path}"}
+        else:
+            valid.append((i, path, preprocess_image(image_np)))
+
+    if valid:
+        probs = predict_probabilities(_worker_model, torch.stack([t for _, _, t in valid]))
+        for (i, path, _), prob in zip(valid, probs):
+            try:
+                results[i] = {"image_path": path, "status": "success", "mask_path": save_mask(path, prob), "error": None}
+            except Exception as e:
+                results[i] = {"image_path": path, "status": "error", "mask_path": None, "error": str(e)}
+    return results
+
+
+def run_sharded(
+    image_paths: list,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    num_workers: int = 2,
+    threads_per_worker: int = 1,
+    shard_size: int = 4
+) -> list:
+    """
+    多进程分片分割：图像列表切成 shard_size 大小的分片，由 num_workers 个绑核进程动态领取，
+    每个进程只加载一次模型；结果按输入顺序返回。
+    """
+    shards = [image_paths[i:i + shard_size] for i in range(0, len(image_paths), shard_size)]
+    if not shards:
+        return []
+
+    ctx = mp.get_context("spawn")
+    counter = ctx.Value("i", 0)
+    slots = _cpu_slots(num_workers, threads_per_worker)
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(checkpoint_path, backend, threads_per_worker, slots, counter)
+    ) as pool:
+        return [r for shard in pool.map(_segment_shard, shards) for r in shard]
+
+
+@tool(name="segment_crack_images_parallel")
+def segment_crack_images_parallel(
+    image_paths: list,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    num_workers: int = 2,
+    threads_per_worker: int = 1,
+    batch_size: int = 4,
+    use_cache: bool = True
+) -> dict:
+    """
+    多进程批量分割工具：按 batch_size 分片，分发给绑核的 worker 进程并按输入顺序汇总。
+    use_cache 时由主进程统一查询 / 写入掩膜缓存，worker 只处理未命中的图像。
+    """
+    from task_tools.segment import lookup_cached_mask, store_cached_mask
+
+    try:
+        if num_workers < 1 or batch_size < 1:
+            raise ValueError("num_workers 与 batch_size 必须 >= 1")
+
+        per_image = [None] * len(image_paths)
+        misses = []
+        for i, path in enumerate(image_paths):
+            cached = lookup_cached_mask(path, checkpoint_path, backend=backend) if use_cache else None
+            if cached:
+                per_image[i] = {"image_path": path, "status": "success", "mask_path": cached, "error": None}
+            else:
+                misses.append(i)
+
+        t0 = time.perf_counter()
+        sharded = run_sharded(
+            [image_paths[i] for i in misses], checkpoint_path, backend,
+            num_workers=num_workers, threads_per_worker=threads_per_worker, shard_size=batch_size
+        )
+        elapsed = time.perf_counter() - t0
+        for i, r in zip(misses, sharded):
+            per_image[i] = r
+            if use_cache and r["status"] == "success":
+                store_cached_mask(r["image_path"], r["mask_path"], checkpoint_path, backend=backend)
+
+        n_ok = sum(r["status"] == "success" for r in per_image)
+        return {
+            "status": "success" if n_ok == len(image_paths) else ("partial" if n_ok else "error"),
+            "summary": f"多进程分割完成：{n_ok}/{len(image_paths)} 张成功，{num_workers} 个进程 × {threads_per_worker} 线程，耗时 {elapsed:.2f}s",
+            "outputs": {
+                "results": per_image
+            },
+            "error": None
+        }
+
+    except Exception as e:
+        print("[ERROR] segment_crack_images_parallel 异常:", str(e))
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "summary": "多进程分割失败",
+            "outputs": None,
+            "error": str(e)
+        }
+
+
+def scaling_report(
+    image_paths: list,
+    worker_counts: list,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    threads_per_worker: int = 1,
+    shard_size: int = 4
+) -> list:
+    """
+    吞吐量随 worker 数的扩展报告（含进程启动与模型加载开销）。
+    """
+    rows = []
+    base = None
+    for n in worker_counts:
+        t0 = time.perf_counter()
+        run_sharded(image_paths, checkpoint_path, backend, n, threads_per_worker, shard_size)
+        elapsed = time.perf_counter() - t0
+        ips = len(image_paths) / elapsed if elapsed > 0 else 0.0
+        base = base or ips
+        rows.append({
+            "workers": n,
+            "threads_per_worker": threads_per_worker,
+            "total_s": round(elapsed, 3),
+            "images_per_s": round(ips, 3),
+            "speedup": round(ips / base, 2) if base else None
+        })
+    return rows
+
+
+def main():
+    from utils.path_utils import list_image_paths
+
+    parser = argparse.ArgumentParser(description="多进程分割吞吐扩展测试")
+    parser.add_argument("--image-dir", default="data/Test_images")
+    parser.add_argument("--checkpoint", default="checkpoints/unet_best.pth")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--shard-size", type=int, default=4)
+    args = parser.parse_args()
+
+    rows = scaling_report(
+        list_image_paths(args.image_dir), args.workers, args.checkpoint, args.backend,
+        args.threads_per_worker, args.shard_size
+    )
+    print(json.dumps(rows, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
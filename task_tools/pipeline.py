@@ -0,0 +1,165 @@
+import time
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import torch
+from task_tools.registry import tool
+
+from task_tools.segment import load_backend, preprocess_image, predict_probabilities, save_mask
+from utils.path_utils import list_image_paths
+
+_SENTINEL = object()
+
+
+def _decode(path: str):
+    """解码 + 预处理（在线程池中执行，cv2 / PIL 解码会释放 GIL）。"""
+    image_np = cv2.imread(path)
+    if image_np is None:
+        raise FileNotFoundError(f"Image not found: {path}")
+    return preprocess_image(image_np)
+
+
+def run_segmentation_pipeline(
+    image_paths: list,
+    model,
+    batch_size: int = 4,
+    num_workers: int = 4,
+    prefetch: int = 16
+) -> tuple[list, dict]:
+    """
+    流水线分割：解码/预处理 → 推理 → 掩膜编码/写盘 三段重叠执行。
+        - 线程池并行解码，feeder 线程按顺序把 future 放入有界预取队列（最多 prefetch 张在途）；
+        - 主线程按顺序取出、凑批并推理；
+        - 后台写盘线程负责阈值化与 PNG 编码写入。
+    返回 (逐图结果列表，与 image_paths 顺序一致；耗时统计)。
+    """
+    per_image = [None] * len(image_paths)
+    prefetch_q = queue.Queue(maxsize=max(prefetch, 1))
+    write_q = queue.Queue(maxsize=max(prefetch, 1))
+    timings = {"model_s": 0.0, "wait_decode_s": 0.0}
+
+    def error_entry(path, err):
+        return {"image_path": path, "status": "error", "mask_path": None, "error": str(err)}
+
+    def feeder(pool):
+        for i, path in enumerate(image_paths):
+            prefetch_q.put((i, path, pool.submit(_decode, path)))
+        prefetch_q.put(_SENTINEL)
+
+    def writer():
+        while True:
+            item = write_q.get()
+            if item is _SENTINEL:
+                return
+            i, path, prob = item
+            try:
+                per_image[i] = {"image_path": path, "status": "success", "mask_path": save_mask(path, prob), "error": None}
+            except Exception as e:
+                per_image[i] = error_entry(path, e)
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as pool:
+        feeder_thread = threading.Thread(target=feeder, args=(pool,), daemon=True)
+        writer_thread = threading.Thread(target=writer, daemon=True)
+        feeder_thread.start()
+        writer_thread.start()
+
+        def flush(batch):
+            t0 = time.perf_counter()
+            probs = predict_probabilities(model, torch.stack([t for _, _, t in batch]))
+            timings["model_s"] += time.perf_counter() - t0
+            for (i, path, _), prob in zip(batch, probs):
+                write_q.put((i, path, prob))
+
+        batch = []
+        try:
+            while True:
+                t0 = time.perf_counter()
+                item = prefetch_q.get()
+                if item is _SENTINEL:
+                    break
+                i, path, future = item
+                try:
+                    tensor = future.result()
+                except Exception as e:
+                    per_image[i] = error_entry(path, e)
+                    continue
+                finally:
+                    timings["wait_decode_s"] += time.perf_counter() - t0
+                batch.append((i, path, tensor))
+                if len(batch) == batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+        finally:
+            write_q.put(_SENTINEL)
+            writer_thread.join()
+            # 异常提前退出时排空预取队列，避免 feeder 阻塞在 put 上
+            while feeder_thread.is_alive() or not prefetch_q.empty():
+                try:
+                    prefetch_q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            feeder_thread.join()
+
+    total = time.perf_counter() - t_start
+    n = len(image_paths)
+    stats = {
+        "total_s": round(total, 3),
+        "model_s": round(timings["model_s"], 3),
+        "wait_decode_s": round(timings["wait_decode_s"], 3),
+        "model_utilization": round(timings["model_s"] / total, 3) if total > 0 else None,
+        "images_per_s": round(n / total, 2) if total > 0 else None
+    }
+    return per_image, stats
+
+
+@tool(name="segment_crack_directory")
+def segment_crack_directory(
+    image_dir: str = "data/Test_images",
+    image_paths: list | None = None,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    batch_size: int = 4,
+    num_workers: int = 4,
+    prefetch: int = 16
+) -> dict:
+    """
+    目录级流水线分割工具：解码/预处理在线程池中预取，掩膜写盘在后台线程执行，
+    推理与 I/O 重叠，适合成百上千张图像的批量分割。
+    """
+    try:
+        if batch_size < 1:
+            raise ValueError(f"batch_size 必须 >= 1，当前为 {batch_size}")
+        if image_paths is None:
+            image_paths = list_image_paths(image_dir)
+
+        model = load_backend(backend, checkpoint_path)
+        per_image, stats = run_segmentation_pipeline(
+            image_paths, model, batch_size=batch_size, num_workers=num_workers, prefetch=prefetch
+        )
+
+        n_ok = sum(r["status"] == "success" for r in per_image)
+        return {
+            "status": "success" if n_ok == len(image_paths) else ("partial" if n_ok else "error"),
+            "summary": f"流水线分割完成：{n_ok}/{len(image_paths)} 张成功，{stats['images_per_s']} 张/秒",
+            "outputs": {
+                "results": per_image,
+                "timings": stats
+            },
+            "error": None
+        }
+
+    except Exception as e:
+        print("[ERROR] segment_crack_directory 异常:", str(e))
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "summary": "流水线分割失败",
+            "outputs": None,
+            "error": str(e)
+        }
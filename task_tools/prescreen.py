@@ -0,0 +1,225 @@
+import os
+import json
+import argparse
+import traceback
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image as PILImage
+from torchvision import transforms
+from task_tools.registry import tool
+
+from task_tools.segment import (
+    INPUT_SIZE, load_backend, predict_probabilities, save_binary_mask, segment_crack_images,
+    lookup_cached_mask, store_cached_mask
+)
+from utils.path_utils import list_image_paths
+
+
+def screen_images(
+    model,
+    image_paths: list,
+    screen_size: int = 224,
+    screen_threshold: float = 0.5,
+    min_pixels: int = 1,
+    batch_size: int = 16
+) -> list:
+    """
+    低分辨率预筛：同一 UNet 在 screen_size 下推理，概率 > screen_threshold 的像素数不少于 min_pixels
+    即判为疑似有裂缝（需全分辨率分割），否则判为空。screen_threshold 取得比正式阈值低，
+    让不确定的图像也进入第二阶段，以保召回。
+    返回与 image_paths 顺序一致的列表：{"image_path", "positive": bool | None, "score": 最大概率, "error"}
+    """
+    transform = transforms.Compose([transforms.Resize((screen_size, screen_size)), transforms.ToTensor()])
+    decisions = [None] * len(image_paths)
+    valid = []
+    for i, path in enumerate(image_paths):
+        image_np = cv2.imread(path)
+        if image_np is None:
+            decisions[i] = {"image_path": path, "positive": None, "score": None, "error": f"Image not found: {path}"}
+            continue
+        pil_img = PILImage.fromarray(cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB))
+        valid.append((i, path, transform(pil_img)))
+
+    for start in range(0, len(valid), batch_size):
+        chunk = valid[start:start + batch_size]
+        probs = predict_probabilities(model, torch.stack([t for _, _, t in chunk]))
+        for (i, path, _), prob in zip(chunk, probs):
+            decisions[i] = {
+                "image_path": path,
+                "positive": bool((prob > screen_threshold).sum() >= min_pixels),
+                "score": round(float(prob.max()), 4),
+                "error": None
+            }
+    return decisions
+
+
+def prescreen_cache_mode(screen_size: int, screen_threshold: float, min_pixels: int) -> str:
+    """预筛跳过结果的缓存模式名：预筛参数进入缓存键，参数变化不会复用旧的全零掩膜"""
+    return f"prescreen:{screen_size}:{screen_threshold:g}:{min_pixels}"
+
+
+@tool(name="segment_crack_images_two_stage")
+def segment_crack_images_two_stage(
+    image_paths: list,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    screen_size: int = 224,
+    screen_threshold: float = 0.5,
+    min_pixels: int = 1,
+    batch_size: int = 4,
+    use_cache: bool = True
+) -> dict:
+    """
+    两阶段分割：先低分辨率预筛，判为空的图像直接写全零掩膜，仅疑似有裂缝的图像做 896×896 全分辨率分割。
+    use_cache 时先查全分辨率掩膜缓存，再查预筛跳过缓存（键含预筛参数），命中的图像不再预筛；
+    跳过的全零掩膜只写入预筛缓存，不会被 segment_crack_image 当作全分辨率结果复用。
+    """
+    try:
+        cache_mode = prescreen_cache_mode(screen_size, screen_threshold, min_pixels)
+        per_image = [None] * len(image_paths)
+        to_screen = []
+        for i, path in enumerate(image_paths):
+            if use_cache:
+                cached = lookup_cached_mask(path, checkpoint_path, backend=backend)
+                if cached:
+                    per_image[i] = {"image_path": path, "status": "success", "mask_path": cached, "error": None, "skipped": False}
+                    continue
+                cached = lookup_cached_mask(path, checkpoint_path, mode=cache_mode, backend=backend)
+                if cached:
+                    per_image[i] = {"image_path": path, "status": "success", "mask_path": cached, "error": None, "skipped": True}
+                    continue
+            to_screen.append(i)
+
+        model = load_backend(backend, checkpoint_path) if to_screen else None
+        decisions = screen_images(model, [image_paths[i] for i in to_screen], screen_size, screen_threshold, min_pixels)
+
+        positives = []
+        for i, d in zip(to_screen, decisions):
+            if d["error"]:
+                per_image[i] = {"image_path": d["image_path"], "status": "error", "mask_path": None, "error": d["error"]}
+            elif d["positive"]:
+                positives.append(i)
+            else:
+                blank = np.zeros(INPUT_SIZE, dtype=np.uint8)
+                mask_path = save_binary_mask(d["image_path"], blank)
+                if use_cache:
+                    store_cached_mask(d["image_path"], mask_path, checkpoint_path, mode=cache_mode, backend=backend)
+                per_image[i] = {
+                    "image_path": d["image_path"],
+                    "status": "success",
+                    "mask_path": mask_path,
+                    "error": None,
+                    "skipped": True
+                }
+
+        if positives:
+            full = segment_crack_images(
+                [image_paths[i] for i in positives], checkpoint_path, batch_size=batch_size, backend=backend,
+                use_cache=use_cache
+            )
+            full_results = (full.get("outputs") or {}).get("results") or []
+            if len(full_results) != len(positives):
+                raise RuntimeError(full.get("error") or "全分辨率分割失败")
+            for i, r in zip(positives, full_results):
+                per_image[i] = dict(r, skipped=False)
+
+        n_valid = sum("skipped" in r for r in per_image)
+        n_skipped = sum(r.get("skipped", False) for r in per_image)
+        n_ok = sum(r["status"] == "success" for r in per_image)
+        return {
+            "status": "success" if n_ok == len(image_paths) else ("partial" if n_ok else "error"),
+            "summary": f"两阶段分割完成：{n_ok}/{len(image_paths)} 张成功，预筛跳过 {n_skipped} 张",
+            "outputs": {
+                "results": per_image,
+                "skip_rate": round(n_skipped / n_valid, 3) if n_valid else 0.0
+            },
+            "error": None
+        }
+
+    except Exception as e:
+        print("[ERROR] segment_crack_images_two_stage 异常:", str(e))
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "summary": "两阶段分割失败",
+            "outputs": None,
+            "error": str(e)
+        }
+
+
+def evaluate_prescreen(
+    image_dir: str = "data/Test_images",
+    gt_dir: str = "data/Test_images_GT",
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    screen_size: int = 224,
+    screen_threshold: float = 0.5,
+    min_pixels: int = 1
+) -> dict:
+    """
+    在有 GT 的数据集上评估预筛：跳过率、图像级召回（GT 有裂缝却被判空的比例）
+    以及被跳过图像中丢失的 GT 裂缝像素占比。
+    找不到 / 无法读取 GT 的图像不计入召回与像素统计，单独列在 images_without_gt 中。
+    """
+    image_paths = list_image_paths(image_dir)
+    model = load_backend(backend, checkpoint_path)
+    decisions = screen_images(model, image_paths, screen_size, screen_threshold, min_pixels)
+
+    n_gt_pos = n_missed = 0
+    gt_pixels_total = gt_pixels_lost = 0
+    n_skipped = n_valid = 0
+    per_image = []
+    without_gt = []
+    for d in decisions:
+        if d["error"]:
+            continue
+        n_valid += 1
+        gt_path = os.path.join(gt_dir, os.path.basename(d["image_path"]))
+        gt = cv2.imread(gt_path, cv2.IMREAD_GRAYSCALE)
+        gt_pixels = int((gt > 127).sum()) if gt is not None else None
+        skipped = not d["positive"]
+        n_skipped += skipped
+        if gt_pixels is None:
+            without_gt.append(d["image_path"])
+        elif gt_pixels:
+            n_gt_pos += 1
+            gt_pixels_total += gt_pixels
+            if skipped:
+                n_missed += 1
+                gt_pixels_lost += gt_pixels
+        per_image.append({"image": d["image_path"], "score": d["score"], "skipped": skipped, "gt_crack_pixels": gt_pixels})
+
+    return {
+        "screen_size": screen_size,
+        "screen_threshold": screen_threshold,
+        "skip_rate": round(n_skipped / n_valid, 3) if n_valid else 0.0,
+        "image_recall": round(1 - n_missed / n_gt_pos, 3) if n_gt_pos else None,
+        "recall_loss_images": n_missed,
+        "recall_loss_pixel_ratio": round(gt_pixels_lost / gt_pixels_total, 4) if gt_pixels_total else None,
+        "images_without_gt": without_gt,
+        "images": per_image
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评估低分辨率预筛的跳过率与召回损失")
+    parser.add_argument("--image-dir", default="data/Test_images")
+    parser.add_argument("--gt-dir", default="data/Test_images_GT")
+    parser.add_argument("--checkpoint", default="checkpoints/unet_best.pth")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--screen-size", type=int, default=224)
+    parser.add_argument("--screen-threshold", type=float, default=0.5)
+    parser.add_argument("--min-pixels", type=int, default=1)
+    args = parser.parse_args()
+
+    report = evaluate_prescreen(
+        args.image_dir, args.gt_dir, args.checkpoint, args.backend,
+        args.screen_size, args.screen_threshold, args.min_pixels
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
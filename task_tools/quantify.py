@@ -1,65 +1,93 @@
 import os
 import cv2
+import numpy as np
 import traceback
 from task_tools.registry import tool
 
-from crack_metrics.binarize import binarize
-from crack_metrics.area import compute_crack_area_px
-from crack_metrics.length import compute_crack_length_px
-from crack_metrics.width_max import compute_max_width_px
-from crack_metrics.width_avg import compute_average_width_px
-from crack_metrics.skeleton import extract_skeleton_and_normals
-from utils.visualize import visualize_max_width, save_visual
-from utils.io_utils import append_to_csv
+from crack_metrics.analysis import MaskAnalysis
+from crack_metrics.metric_table import compute_metric_values
+from crack_metrics.compact_mask import load_mask_analysis, mask_stem
+from crack_metrics.instances import compute_instance_metrics
+from crack_metrics.out_of_core import OutOfCoreAnalysis, open_mask
+from utils.visualize import visualize_max_width, draw_normal_arrows, save_visual
+from utils.io_utils import append_to_csv, replace_image_rows
+from utils.mask_cache import mask_digest
 
 
 @tool(name="quantify_crack_metrics")
-def quantify_crack_metrics(mask_path: str, pixel_size_mm: float, metrics: list | None = None) -> dict:
-    """Compute crack geometry metrics from a mask image and append results to CSV."""
+def quantify_crack_metrics(
+    mask_path: str,
+    pixel_size_mm: float,
+    metrics: list | None = None,
+    per_instance: bool = False,
+    num_workers: int = 0,
+    out_of_core: bool = False,
+    tile_size: int = 2048,
+    halo: int = 64
+) -> dict:
+    """Compute crack geometry metrics from a mask image and append results to CSV.
+
+    metrics=None keeps the original four columns (length, area, max / avg width); the extra
+    metrics (geometric length, branch count, width percentiles) are opt-in by name, or ["all"].
+
+    per_instance=True additionally measures every connected crack separately (optionally in a
+    worker pool) and writes a per-instance table to outputs/csv/instance_metrics.csv.
+    mask_path may also be a run-length mask (.rle.npz, see crack_metrics.compact_mask); only its
+    bounding-box ROI is expanded.
+    out_of_core=True reads a memory-mapped .npy / .tif mask tile by tile (see
+    crack_metrics.out_of_core) so memory stays bounded by tile_size + 2 * halo. halo is enlarged
+    automatically when the measured max width comes close to it; the value used is returned as
+    out_of_core_halo.
+    """
     try:
         if not os.path.exists(mask_path):
             raise FileNotFoundError(f"Mask not found: {mask_path}")
 
-        mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
-        if mask is None:
-            raise ValueError(f"Invalid image format: {mask_path}")
-
-        binary = binarize(mask)
-
-        all_metrics = {
-            "Length (mm)": lambda: round(compute_crack_length_px(binary) * pixel_size_mm, 2),
-            "Area (mm^2)": lambda: round(compute_crack_area_px(binary) * pixel_size_mm ** 2, 2),
-            "Max Width (mm)": lambda: round(compute_max_width_px(binary) * pixel_size_mm, 2),
-            "Avg Width (mm)": lambda: round(compute_average_width_px(binary) * pixel_size_mm, 2),
-        }
-        alias = {
-            "Length (mm)": "length",
-            "Area (mm^2)": "area",
-            "Max Width (mm)": "max_width",
-            "Avg Width (mm)": "avg_width",
-        }
-
-        if not metrics:
-            selected = list(all_metrics.keys())
+        offset = (0, 0)
+        if out_of_core:
+            if per_instance:
+                raise ValueError("out-of-core 模式暂不支持逐实例指标")
+            analysis = OutOfCoreAnalysis(open_mask(mask_path), tile_size=tile_size, halo=halo)
         else:
-            selected = []
-            for m in metrics:
-                for k in all_metrics:
-                    if m.lower().replace(" ", "").replace("_", "") in k.lower().replace(" ", "").replace("_", ""):
-                        selected.append(k)
-
-        results = {alias[name]: all_metrics[name]() for name in selected}
-
-        csv_values = {name: all_metrics[name]() for name in selected}
-        image_name = os.path.splitext(os.path.basename(mask_path))[0]
+            # 骨架 / 轮廓 / KD 树只计算一次，所有指标共享；.rle.npz 游程掩膜只展开 ROI
+            analysis, offset = load_mask_analysis(mask_path)
+        csv_values, results = compute_metric_values(analysis, pixel_size_mm, metrics)
+        # 像素值与标定无关，按掩膜内容哈希缓存后可直接换算任意 pixel_size_mm；
+        # 放在顶层 cache 键下，仅供 MemoryController 使用，不混入展示给用户的 outputs
+        cache = {"pixel_metrics": results.pop("pixel_metrics"), "mask_hash": mask_digest(mask_path)}
+        if out_of_core:
+            results["out_of_core_halo"] = analysis.halo
+
+        image_name = mask_stem(mask_path)
         os.makedirs("outputs/csv", exist_ok=True)
         append_to_csv("outputs/csv/predicted_metrics.csv", image_name, csv_values)
 
+        if per_instance:
+            rows = [
+                {
+                    "Instance": r["instance"],
+                    "BBox (x,y,w,h)": "{},{},{},{}".format(r["bbox"][0] + offset[0], r["bbox"][1] + offset[1], *r["bbox"][2:]),
+                    "Length (mm)": round(r["length_px"] * pixel_size_mm, 2),
+                    "Geometric Length (mm)": round(r["geometric_length_px"] * pixel_size_mm, 2),
+                    "Area (mm^2)": round(r["area_px"] * pixel_size_mm ** 2, 2),
+                    "Max Width (mm)": round(r["max_width_px"] * pixel_size_mm, 2),
+                    "Avg Width (mm)": round(r["avg_width_px"] * pixel_size_mm, 2),
+                    "Width P50 (mm)": round(r["width_p50_px"] * pixel_size_mm, 2),
+                    "Width P90 (mm)": round(r["width_p90_px"] * pixel_size_mm, 2),
+                    "Branch Count": r["branch_count"],
+                }
+                for r in compute_instance_metrics(analysis.binary, num_workers=num_workers)
+            ]
+            replace_image_rows("outputs/csv/instance_metrics.csv", image_name, rows)
+            results["instances"] = rows
+            results["instance_count"] = len(rows)
+
         return {
             "status": "success",
-            "summary": f"量化完成，共 {len(results)} 项",
+            "summary": f"量化完成，共 {len(csv_values)} 项",
             "outputs": results,
             "visualizations": None,
+            "cache": cache,
             "error": None,
         }
 
@@ -84,7 +112,7 @@ def generate_crack_visuals(mask_path: str, pixel_size_mm: float = 0.5, visuals:
         if img_raw is None:
             raise ValueError(f"Invalid image format: {mask_path}")
 
-        mask = binarize(img_raw)
+        analysis = MaskAnalysis(img_raw)
         if visuals is None:
             visuals = ["skeleton", "max_width"]
 
@@ -93,8 +121,8 @@ def generate_crack_visuals(mask_path: str, pixel_size_mm: float = 0.5, visuals:
         visual_dir = os.path.join("outputs", "visuals")
         os.makedirs(visual_dir, exist_ok=True)
 
-        if any(v in visuals for v in ["skeleton", "normals"]):
-            _, centers, normals = extract_skeleton_and_normals(mask)
+        if any(v in visuals for v in ["skeleton", "normals", "all"]):
+            centers, normals = analysis.skeleton_points, analysis.normals
         else:
             centers, normals = [], []
 
@@ -107,17 +135,26 @@ def generate_crack_visuals(mask_path: str, pixel_size_mm: float = 0.5, visuals:
             vis_results["skeleton"] = path
 
         if "normals" in visuals or "all" in visuals:
-            normal_overlay = img_raw.copy()
-            for pt, n in zip(centers, normals):
-                x, y = int(pt[0]), int(pt[1])
-                dx, dy = n[0], n[1]
-                pt2 = (int(x + dx * 10), int(y + dy * 10))
-                cv2.arrowedLine(normal_overlay, (x, y), pt2, (0, 255, 0), 1, tipLength=0.3)
+            normal_overlay = draw_normal_arrows(img_raw.copy(), centers, normals, length=10)
             path = save_visual(normal_overlay, os.path.join(visual_dir, f"{image_base}_normals.png"))
             vis_results["normals"] = path
 
+        if "branches" in visuals or "all" in visuals:
+            graph = analysis.graph
+            branch_overlay = img_raw.copy()
+            rng = np.random.default_rng(0)
+            for b in range(graph.branch_count):
+                color = tuple(int(c) for c in rng.integers(64, 256, 3))
+                cv2.polylines(branch_overlay, [graph.branch_polyline(b).astype(np.int32)], False, color, 1)
+            for x, y in graph.junctions:
+                cv2.circle(branch_overlay, (int(x), int(y)), 3, (0, 0, 255), -1)
+            for x, y in graph.endpoints:
+                cv2.circle(branch_overlay, (int(x), int(y)), 3, (0, 255, 0), -1)
+            path = save_visual(branch_overlay, os.path.join(visual_dir, f"{image_base}_branches.png"))
+            vis_results["branches"] = path
+
         if "max_width" in visuals or "all" in visuals:
-            vis_width, _ = visualize_max_width(img_raw)
+            vis_width, _ = visualize_max_width(img_raw, analysis)
             path = save_visual(vis_width, os.path.join(visual_dir, f"{image_base}_max_width.png"))
             vis_results["max_width_overlay"] = path
 
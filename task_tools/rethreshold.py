@@ -0,0 +1,53 @@
+import os
+import glob
+import cv2
+from task_tools.registry import tool
+
+from utils.prob_maps import threshold_prob_map
+
+
+@tool(name="rethreshold_masks")
+def rethreshold_masks(prob_dir: str = "outputs/masks", threshold: float = 0.9, output_dir: str | None = None) -> dict:
+    """
+    阈值重设工具：读取 segment_crack_image(save_prob=True) 保存的概率图（*_prob.npz / *_prob.npy），
+    按新阈值批量生成 0/255 掩膜，全程不加载模型。
+    output_dir 缺省时写到 <prob_dir>_t<threshold>（如 outputs/masks_t0.5），不覆盖 prob_dir 中的标准掩膜：
+    掩膜缓存的键包含默认阈值 MASK_THRESHOLD，命中时会把原阈值掩膜复制回标准路径，覆盖写入会被悄悄还原。
+    """
+    try:
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError(f"threshold 必须在 [0, 1] 范围内，当前为 {threshold}")
+        if not os.path.isdir(prob_dir):
+            raise FileNotFoundError(f"概率图目录不存在: {prob_dir}")
+
+        prob_paths = sorted(glob.glob(os.path.join(prob_dir, "*_prob.npz")) + glob.glob(os.path.join(prob_dir, "*_prob.npy")))
+        if not prob_paths:
+            raise FileNotFoundError(f"未找到概率图文件（*_prob.npz / *_prob.npy）: {prob_dir}")
+
+        output_dir = output_dir or f"{os.path.normpath(prob_dir)}_t{threshold:g}"
+        os.makedirs(output_dir, exist_ok=True)
+
+        mask_paths = {}
+        for path in prob_paths:
+            name = os.path.basename(path).rsplit("_prob.", 1)[0]
+            mask_path = os.path.join(output_dir, f"{name}.png")
+            cv2.imwrite(mask_path, threshold_prob_map(path, threshold) * 255)
+            mask_paths[name] = mask_path
+
+        return {
+            "status": "success",
+            "summary": f"按阈值 {threshold} 重新生成 {len(mask_paths)} 张掩膜",
+            "outputs": {
+                "threshold": threshold,
+                "mask_paths": mask_paths
+            },
+            "error": None
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "summary": "阈值重设失败",
+            "outputs": None,
+            "error": str(e)
+        }
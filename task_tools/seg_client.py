@@ -0,0 +1,41 @@
+import os
+import json
+import base64
+import urllib.request
+
+import cv2
+import numpy as np
+
+# 设置后 segment_crack_image / segment_crack_images 将作为客户端调用本地分割服务
+SERVER_ENV = "CRACK_SEG_SERVER"
+
+
+def get_server_url() -> str | None:
+    url = os.getenv(SERVER_ENV, "").strip()
+    return url.rstrip("/") or None
+
+
+def request_masks(server_url: str, image_paths: list, timeout: float = 300.0) -> list:
+    """
+    向分割服务提交一组图像（绝对路径），返回与输入顺序一致的结果：
+        [{"image_path", "status", "mask": 0/1 uint8 数组或 None, "error", "model": 服务端模型信息}, ...]
+    """
+    payload = json.dumps({"image_paths": [os.path.abspath(p) for p in image_paths]}).encode("utf-8")
+    req = urllib.request.Request(
+        f"{server_url}/segment",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        body = json.loads(resp.read().decode("utf-8"))
+    results, model = body["results"], body.get("model")
+
+    decoded = []
+    for path, r in zip(image_paths, results):
+        mask = None
+        if r["status"] == "success":
+            png = np.frombuffer(base64.b64decode(r["mask_png_b64"]), dtype=np.uint8)
+            mask = (cv2.imdecode(png, cv2.IMREAD_GRAYSCALE) > 0).astype(np.uint8)
+        decoded.append({"image_path": path, "status": r["status"], "mask": mask, "error": r["error"], "model": model})
+    return decoded
@@ -0,0 +1,206 @@
+import time
+import json
+import queue
+import base64
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import torch
+
+from task_tools.segment import load_backend, preprocess_image, predict_probabilities, MASK_THRESHOLD
+from utils.mask_cache import get_mask_cache
+
+
+class _Request:
+    def __init__(self, tensor: torch.Tensor):
+        self.tensor = tensor
+        self.done = threading.Event()
+        self.prob = None
+        self.error = None
+
+
+class DynamicBatcher:
+    """
+    动态批处理：后台线程收集并发请求，凑满 max_batch 或自第一个请求起等待超过 max_wait_ms 后一起推理。
+    """
+
+    def __init__(self, model, max_batch: int = 8, max_wait_ms: float = 20.0):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "model_s": 0.0}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, tensor: torch.Tensor) -> _Request:
+        req = _Request(tensor)
+        self.queue.put(req)
+        return req
+
+    @staticmethod
+    def wait(req: _Request, timeout: float = 300.0) -> np.ndarray:
+        if not req.done.wait(timeout):
+            raise TimeoutError("分割请求超时")
+        if req.error is not None:
+            raise req.error
+        return req.prob
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # 输入尺寸一致（均为 INPUT_SIZE），可直接堆叠
+            try:
+                t0 = time.perf_counter()
+                probs = predict_probabilities(self.model, torch.stack([r.tensor for r in batch]))
+                elapsed = time.perf_counter() - t0
+                for r, p in zip(batch, probs):
+                    r.prob = p
+            except Exception as e:
+                elapsed = 0.0
+                for r in batch:
+                    r.error = e
+            finally:
+                with self._lock:
+                    self.stats["requests"] += len(batch)
+                    self.stats["batches"] += 1
+                    self.stats["model_s"] += elapsed
+                for r in batch:
+                    r.done.set()
+
+    def report(self) -> dict:
+        with self._lock:
+            s = dict(self.stats)
+        s["avg_batch_size"] = round(s["requests"] / s["batches"], 2) if s["batches"] else None
+        s["model_s"] = round(s["model_s"], 3)
+        return s
+
+
+def _make_handler(batcher: DynamicBatcher, threshold: float, model_info: dict):
+    class SegmentHandler(BaseHTTPRequestHandler):
+        def _send_json(self, code: int, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "model": model_info, "stats": batcher.report()})
+            else:
+                self._send_json(404, {"error": f"unknown path: {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/segment":
+                self._send_json(404, {"error": f"unknown path: {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                image_paths = payload.get("image_paths") or [payload["image_path"]]
+            except Exception as e:
+                self._send_json(400, {"error": f"invalid request: {e}"})
+                return
+
+            # 先全部入队再等待，同一请求内的多张图像也能进入同一批次
+            pending = []
+            for path in image_paths:
+                try:
+                    image_np = cv2.imread(path)
+                    if image_np is None:
+                        raise FileNotFoundError(f"Image not found: {path}")
+                    pending.append((path, batcher.submit(preprocess_image(image_np)), None))
+                except Exception as e:
+                    pending.append((path, None, e))
+
+            results = []
+            for path, req, err in pending:
+                try:
+                    if err is not None:
+                        raise err
+                    prob = batcher.wait(req)
+                    ok, png = cv2.imencode(".png", (prob > threshold).astype(np.uint8) * 255)
+                    if not ok:
+                        raise RuntimeError("掩膜 PNG 编码失败")
+                    results.append({
+                        "image_path": path,
+                        "status": "success",
+                        "mask_png_b64": base64.b64encode(png.tobytes()).decode("ascii"),
+                        "error": None
+                    })
+                except Exception as e:
+                    results.append({"image_path": path, "status": "error", "mask_png_b64": None, "error": str(e)})
+            # 附带服务端模型信息，客户端据此构建掩膜缓存键
+            self._send_json(200, {"results": results, "model": model_info})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return SegmentHandler
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "optimized",
+    max_batch: int = 8,
+    max_wait_ms: float = 20.0,
+    num_threads: int = None
+) -> ThreadingHTTPServer:
+    """
+    创建本地分割服务（常驻一份已预热的模型）。调用方负责 serve_forever() / shutdown()。
+    """
+    model = load_backend(backend, checkpoint_path, num_threads)
+    batcher = DynamicBatcher(model, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    model_info = {
+        "checkpoint_digest": get_mask_cache().checkpoint_digest(checkpoint_path),
+        "backend": backend,
+        "threshold": MASK_THRESHOLD
+    }
+    server = ThreadingHTTPServer((host, port), _make_handler(batcher, MASK_THRESHOLD, model_info))
+    server.daemon_threads = True
+    server.batcher = batcher
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地裂缝分割服务（动态批处理）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--checkpoint", default="checkpoints/unet_best.pth")
+    parser.add_argument("--backend", default="optimized")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20.0)
+    parser.add_argument("--threads", type=int, default=None, help="推理 intra-op 线程数")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.checkpoint, args.backend, args.max_batch, args.max_wait_ms, args.threads)
+    print(f"🚀 分割服务已启动: http://{args.host}:{server.server_address[1]}  (设置 CRACK_SEG_SERVER 以启用客户端模式)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"🧾 服务统计: {server.batcher.report()}")
+
+
+if __name__ == "__main__":
+    main()
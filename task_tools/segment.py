@@ -8,63 +8,287 @@ from torchvision import transforms
 from task_tools.registry import tool
 
 from models.unet import UNet
+from models.tiling import sliding_window_predict
+from models.backends import OnnxBackend, TorchScriptBackend
+from models.export import artifact_path
+from models.optimize import optimize_for_inference, measure_latency
 from utils.preprocess import resolve_output_path
+from utils.mask_cache import get_mask_cache
+from utils.prob_maps import save_prob_map
+from task_tools.seg_client import get_server_url, request_masks
 
 # 初始化模型（只加载一次）
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-_model = None
+_models = {}
+_backends = {}
+# 优化模型加载时测得的延迟报告，键为 (checkpoint_path, optimize, num_threads)
+load_reports = {}
 
-def load_model(checkpoint_path: str = "checkpoints/unet_best.pth") -> torch.nn.Module:
-    global _model
-    if _model is None:
+INPUT_SIZE = (896, 896)
+MASK_THRESHOLD = 0.9
+
+_transform = transforms.Compose([
+    transforms.Resize(INPUT_SIZE),
+    transforms.ToTensor()
+])
+
+
+def load_model(checkpoint_path: str = "checkpoints/unet_best.pth", optimize: bool = False, num_threads: int = None) -> torch.nn.Module:
+    """
+    加载 eager UNet（每个 checkpoint 只加载一次）。
+    optimize=True 时走优化推理路径：BN 折叠进卷积、channels_last、显式设置线程数，
+    并在加载时预热，首请求 / 稳态延迟记录在 load_reports 中。
+    """
+    key = (checkpoint_path, optimize, num_threads if optimize else None)
+    if key not in _models:
         model = UNet(in_channels=3, num_classes=1)
         model.load_state_dict(torch.load(checkpoint_path, map_location=device))
         model.to(device)
         model.eval()
-        _model = model
-    return _model
+        if optimize:
+            model = optimize_for_inference(model, num_threads=num_threads)
+            load_reports[key] = measure_latency(model, input_size=INPUT_SIZE[0], device=device)
+            print(f"⚡ 优化模型已预热: {load_reports[key]}")
+        _models[key] = model
+    return _models[key]
+
+
+def load_backend(backend: str = "torch", checkpoint_path: str = "checkpoints/unet_best.pth", num_threads: int = None):
+    """
+    按名称加载推理后端（每种后端只加载一次），返回可像 nn.Module 一样调用的对象：
+        torch       → eager PyTorch UNet
+        optimized   → load_model(optimize=True) 的优化 eager UNet
+        torchscript → <checkpoint>.ts.pt（由 python -m models.export 导出）
+        onnx        → <checkpoint>.onnx，经 ONNX Runtime 以固定线程数运行
+        int8        → <checkpoint>.int8.pt（由 python -m models.quantize 生成的静态量化模型，仅 CPU）
+    num_threads：PyTorch intra-op 线程数（ONNX Runtime 为会话线程数）；torch.set_num_threads 是进程级设置，
+        每次调用都会重新应用，缓存命中时同样生效。
+    """
+    if num_threads and backend != "onnx":
+        torch.set_num_threads(num_threads)
+    if backend == "torch":
+        return load_model(checkpoint_path)
+    if backend == "optimized":
+        return load_model(checkpoint_path, optimize=True, num_threads=num_threads)
+
+    key = (backend, checkpoint_path, num_threads)
+    if key not in _backends:
+        if backend == "onnx":
+            _backends[key] = OnnxBackend(artifact_path(checkpoint_path, "onnx"), num_threads=num_threads)
+        elif backend == "torchscript":
+            _backends[key] = TorchScriptBackend(artifact_path(checkpoint_path, "torchscript"), device=device)
+        elif backend == "int8":
+            _backends[key] = TorchScriptBackend(artifact_path(checkpoint_path, "int8"), device=torch.device("cpu"))
+        else:
+            raise ValueError(f"未知推理后端: {backend}")
+    return _backends[key]
+
+
+def preprocess_image(image_np: np.ndarray) -> torch.Tensor:
+    """
+    BGR 原图 → 模型输入张量 (3, H, W)，与单图分割保持一致的预处理。
+    """
+    pil_img = PILImage.fromarray(cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB)).convert("RGB")
+    return _transform(pil_img)
+
+
+def predict_probabilities(model: torch.nn.Module, batch: torch.Tensor) -> np.ndarray:
+    """
+    对 (N, 3, H, W) 批次做一次前向推理，返回 (N, H, W) 的 sigmoid 概率图。
+    """
+    with torch.inference_mode():
+        pred = torch.sigmoid(model(batch.to(device)))
+    return pred[:, 0].cpu().numpy()
+
+
+def save_mask(image_path: str, prob_map: np.ndarray, threshold: float = MASK_THRESHOLD) -> str:
+    """
+    概率图二值化后保存为 0/255 掩膜，返回掩膜路径。
+    """
+    binary_mask = (prob_map > threshold).astype(np.uint8)
+    return save_binary_mask(image_path, binary_mask)
+
+
+def save_binary_mask(image_path: str, binary_mask: np.ndarray) -> str:
+    """
+    保存 0/1 掩膜为 0/255 PNG，返回掩膜路径。
+    """
+    output_path = resolve_output_path(image_path, suffix="mask", output_dir="outputs/masks")
+    cv2.imwrite(output_path, binary_mask * 255)
+
+    if not os.path.exists(output_path):
+        raise RuntimeError(f"掩膜保存失败，未找到文件: {output_path}")
+    return output_path
+
+
+def mask_cache_key(
+    image_path: str,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    mode: str = "resize",
+    backend: str = "torch",
+    tile_size: int = 896,
+    tile_overlap: int = 128,
+    checkpoint_digest: str = None
+) -> str:
+    """
+    计算掩膜缓存键：图像内容 + checkpoint 摘要 + 输入尺寸 + 阈值 + 推理模式/后端。
+    checkpoint_digest 给定时代替 checkpoint_path 的文件摘要（分割服务端的模型）。
+    """
+    input_size = INPUT_SIZE if mode == "resize" else (tile_size, tile_overlap)
+    return get_mask_cache().make_key(image_path, checkpoint_path, input_size, MASK_THRESHOLD, mode=f"{mode}:{backend}",
+                                     checkpoint_digest=checkpoint_digest)
+
+
+def lookup_cached_mask(image_path: str, checkpoint_path: str = "checkpoints/unet_best.pth", **key_args) -> str | None:
+    """
+    查询内容寻址缓存，命中时把掩膜复制到 outputs/masks 下的标准路径并返回该路径，否则返回 None。
+    """
+    if not os.path.exists(image_path):
+        return None
+    key = mask_cache_key(image_path, checkpoint_path, **key_args)
+    dest = resolve_output_path(image_path, suffix="mask", output_dir="outputs/masks")
+    return get_mask_cache().get(key, dest_path=dest)
+
+
+def store_cached_mask(image_path: str, mask_path: str, checkpoint_path: str = "checkpoints/unet_best.pth", **key_args):
+    get_mask_cache().put(mask_cache_key(image_path, checkpoint_path, **key_args), mask_path, source=image_path)
+
+
+def segment_via_server(server_url: str, image_paths: list, checkpoint_path: str, use_cache: bool, **key_args) -> list:
+    """
+    客户端模式：把图像交给本地分割服务（task_tools.seg_server）推理，掩膜写到本地标准路径。
+    返回与 image_paths 顺序一致的逐图结果。
+    服务端模型与后端在其启动时确定，可能与客户端参数不同：写缓存时的键取自响应中的
+    checkpoint 摘要与后端；响应未携带模型信息（旧版服务）时不写缓存。
+    """
+    per_image = []
+    for r in request_masks(server_url, image_paths):
+        path = r["image_path"]
+        if r["status"] != "success":
+            per_image.append({"image_path": path, "status": "error", "mask_path": None, "error": r["error"]})
+            continue
+        mask_path = save_binary_mask(path, r["mask"])
+        model = r.get("model") or {}
+        if use_cache and model.get("checkpoint_digest") and model.get("backend"):
+            get_mask_cache().put(
+                mask_cache_key(path, checkpoint_path, mode="resize", backend=model["backend"],
+                               checkpoint_digest=model["checkpoint_digest"]),
+                mask_path,
+                source=path
+            )
+        per_image.append({"image_path": path, "status": "success", "mask_path": mask_path, "error": None})
+    return per_image
 
 
 @tool(name="segment_crack_image")
-def segment_crack_image(image_path: str, checkpoint_path: str = "checkpoints/unet_best.pth") -> dict:
+def segment_crack_image(
+    image_path: str,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    mode: str = "resize",
+    tile_size: int = 896,
+    tile_overlap: int = 128,
+    tile_batch_size: int = 4,
+    backend: str = "torch",
+    use_cache: bool = True,
+    save_prob: bool = False,
+    prob_format: str = "uint8",
+    num_threads: int = None
+) -> dict:
     """
     图像分割工具：输入图像路径，输出掩膜图像路径（0/255 单通道图）
+    mode="resize"：缩放到 896×896 推理（默认）；
+    mode="tiled"：原分辨率重叠滑窗推理，掩膜与原图同尺寸，适合大尺寸无人机/相机照片。
+    backend：torch（默认）/ optimized / torchscript / onnx / int8，见 load_backend。
+    num_threads：推理 intra-op 线程数，透传给 load_backend（默认不修改）。
+    use_cache：先查内容寻址掩膜缓存（utils.mask_cache），命中则跳过推理。
+    save_prob：同时在掩膜旁保存紧凑概率图（uint8 .npz / float16 .npy），之后可用
+        rethreshold_masks 换阈值重新二值化而无需再跑网络；此时不查缓存以保证概率图与掩膜一致。
+    设置环境变量 CRACK_SEG_SERVER 时，resize 模式作为客户端交给本地分割服务推理（服务端模型与后端在启动时确定）。
     """
     try:
+        if mode not in {"resize", "tiled"}:
+            raise ValueError(f"未知分割模式: {mode}")
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image not found: {image_path}")
+
+        key_args = {"mode": mode, "backend": backend, "tile_size": tile_size, "tile_overlap": tile_overlap}
+        if use_cache and not save_prob:
+            cached = lookup_cached_mask(image_path, checkpoint_path, **key_args)
+            if cached:
+                return {
+                    "status": "success",
+                    "summary": "命中掩膜缓存，跳过推理",
+                    "outputs": {
+                        "mask_path": cached
+                    },
+                    "error": None
+                }
+
+        server_url = get_server_url()
+        if server_url and mode == "resize" and not save_prob:
+            r = segment_via_server(server_url, [image_path], checkpoint_path, use_cache, **key_args)[0]
+            if r["status"] != "success":
+                raise RuntimeError(r["error"])
+            return {
+                "status": "success",
+                "summary": "裂缝分割完成（分割服务），掩膜图像已保存",
+                "outputs": {
+                    "mask_path": r["mask_path"]
+                },
+                "error": None
+            }
+
         # 1. 读取原图（BGR）
         image_np = cv2.imread(image_path)
         if image_np is None:
             raise FileNotFoundError(f"Image not found: {image_path}")
 
+        if mode == "tiled":
+            model = load_backend(backend, checkpoint_path, num_threads)
+            tiled_out = sliding_window_predict(
+                model,
+                cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB),
+                tile_size=tile_size,
+                overlap=tile_overlap,
+                batch_size=tile_batch_size,
+                device=device,
+                threshold=None if save_prob else MASK_THRESHOLD
+            )
+            if save_prob:
+                output_path = save_mask(image_path, tiled_out)
+            else:
+                output_path = save_binary_mask(image_path, tiled_out)
+            outputs = {"mask_path": output_path}
+            if save_prob:
+                outputs["prob_path"] = save_prob_map(output_path, tiled_out, fmt=prob_format)
+            if use_cache:
+                store_cached_mask(image_path, output_path, checkpoint_path, **key_args)
+            return {
+                "status": "success",
+                "summary": f"裂缝分割完成（原分辨率滑窗 {image_np.shape[1]}×{image_np.shape[0]}），掩膜图像已保存",
+                "outputs": outputs,
+                "error": None
+            }
+
         # 2. 转换为 PIL，RGB，并预处理
-        pil_img = PILImage.fromarray(cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB)).convert("RGB")
-        transform = transforms.Compose([
-            transforms.Resize((896, 896)),
-            transforms.ToTensor()
-        ])
-        input_tensor = transform(pil_img).unsqueeze(0).to(device)
+        input_tensor = preprocess_image(image_np).unsqueeze(0)
 
         # 3. 推理
-        model = load_model(checkpoint_path)
-        with torch.no_grad():
-            pred = model(input_tensor)
-            pred = torch.sigmoid(pred)
-            pred_mask = pred[0, 0].cpu().numpy()
-            binary_mask = (pred_mask > 0.9).astype(np.uint8)
-
-        # 4. 保存掩膜图像
-        output_path = resolve_output_path(image_path, suffix="mask", output_dir="outputs/masks")
-        cv2.imwrite(output_path, binary_mask * 255)
+        model = load_backend(backend, checkpoint_path, num_threads)
+        pred_mask = predict_probabilities(model, input_tensor)[0]
 
-        if not os.path.exists(output_path):
-            raise RuntimeError(f"掩膜保存失败，未找到文件: {output_path}")
+        # 4. 保存掩膜图像（及可选概率图）
+        output_path = save_mask(image_path, pred_mask)
+        outputs = {"mask_path": output_path}
+        if save_prob:
+            outputs["prob_path"] = save_prob_map(output_path, pred_mask, fmt=prob_format)
+        if use_cache:
+            store_cached_mask(image_path, output_path, checkpoint_path, **key_args)
 
         return {
             "status": "success",
             "summary": "裂缝分割完成，掩膜图像已保存",
-            "outputs": {
-                "mask_path": output_path
-            },
+            "outputs": outputs,
             "error": None
         }
 
@@ -77,3 +301,106 @@ def segment_crack_image(image_path: str, checkpoint_path: str = "checkpoints/une
             "outputs": None,
             "error": str(e)
         }
+
+
+@tool(name="segment_crack_images")
+def segment_crack_images(
+    image_paths: list,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    batch_size: int = 4,
+    backend: str = "torch",
+    use_cache: bool = True,
+    save_prob: bool = False,
+    prob_format: str = "uint8",
+    num_threads: int = None
+) -> dict:
+    """
+    批量分割工具：将多张图像按 batch_size 堆叠成小批次，每个批次只做一次前向推理。
+    outputs["results"] 与 image_paths 顺序一一对应，单张图像失败不影响其它图像。
+    use_cache 时缓存命中的图像不参与推理；save_prob 时保存概率图，num_threads 为推理线程数（见 segment_crack_image）。
+    """
+    try:
+        if batch_size < 1:
+            raise ValueError(f"batch_size 必须 >= 1，当前为 {batch_size}")
+
+        per_image = [None] * len(image_paths)
+
+        # 1. 查缓存；读取并预处理，无法读取的图像直接记为失败
+        server_url = None if save_prob else get_server_url()
+        valid = []
+        remote = []
+        for i, path in enumerate(image_paths):
+            cached = lookup_cached_mask(path, checkpoint_path, backend=backend) if use_cache and not save_prob else None
+            if cached:
+                per_image[i] = {
+                    "image_path": path,
+                    "status": "success",
+                    "mask_path": cached,
+                    "error": None
+                }
+                continue
+            if server_url:
+                remote.append(i)
+                continue
+            image_np = cv2.imread(path)
+            if image_np is None:
+                per_image[i] = {
+                    "image_path": path,
+                    "status": "error",
+                    "mask_path": None,
+                    "error": f"Image not found: {path}"
+                }
+                continue
+            valid.append((i, path, preprocess_image(image_np)))
+
+        if remote:
+            remote_results = segment_via_server(server_url, [image_paths[i] for i in remote], checkpoint_path, use_cache, backend=backend)
+            for i, r in zip(remote, remote_results):
+                per_image[i] = r
+
+        # 2. 小批次推理 + 保存掩膜（全部命中缓存时不加载模型）
+        model = load_backend(backend, checkpoint_path, num_threads) if valid else None
+        for start in range(0, len(valid), batch_size):
+            chunk = valid[start:start + batch_size]
+            batch = torch.stack([t for _, _, t in chunk])
+            probs = predict_probabilities(model, batch)
+            for (i, path, _), prob in zip(chunk, probs):
+                try:
+                    mask_path = save_mask(path, prob)
+                    if use_cache:
+                        store_cached_mask(path, mask_path, checkpoint_path, backend=backend)
+                    per_image[i] = {
+                        "image_path": path,
+                        "status": "success",
+                        "mask_path": mask_path,
+                        "error": None
+                    }
+                    if save_prob:
+                        per_image[i]["prob_path"] = save_prob_map(mask_path, prob, fmt=prob_format)
+                except Exception as e:
+                    per_image[i] = {
+                        "image_path": path,
+                        "status": "error",
+                        "mask_path": None,
+                        "error": str(e)
+                    }
+
+        n_ok = sum(r["status"] == "success" for r in per_image)
+        return {
+            "status": "success" if n_ok == len(image_paths) else ("partial" if n_ok else "error"),
+            "summary": f"批量分割完成：{n_ok}/{len(image_paths)} 张成功，batch_size={batch_size}",
+            "outputs": {
+                "results": per_image
+            },
+            "error": None
+        }
+
+    except Exception as e:
+        print("[ERROR] segment_crack_images 异常:", str(e))
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "summary": "批量分割失败",
+            "outputs": None,
+            "error": str(e)
+        }
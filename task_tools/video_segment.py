@@ -0,0 +1,218 @@
+import os
+import json
+import argparse
+import traceback
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+from task_tools.registry import tool
+
+from task_tools.segment import INPUT_SIZE, MASK_THRESHOLD, load_backend, preprocess_image, predict_probabilities
+from utils.path_utils import list_image_paths
+
+
+def iter_frames(source: str):
+    """
+    流式读取帧：source 为视频文件时逐帧解码，为目录时按文件名顺序读取图像序列。
+    生成 (帧序号, BGR 帧)。
+    """
+    if os.path.isdir(source):
+        for idx, path in enumerate(list_image_paths(source)):
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield idx, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"无法打开视频: {source}")
+    try:
+        idx = 0
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield idx, frame
+            idx += 1
+    finally:
+        cap.release()
+
+
+def _tile_change(ref: torch.Tensor, cur: torch.Tensor, tile: int) -> np.ndarray:
+    """两帧灰度平均绝对差按 tile 网格汇总，返回 (gh, gw) 的变化量。"""
+    diff = (cur.mean(0) - ref.mean(0)).abs()
+    h, w = diff.shape
+    return diff.reshape(h // tile, tile, w // tile, tile).mean(dim=(1, 3)).numpy()
+
+
+def segment_frame_stream(
+    source: str,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    tile_size: int = 224,
+    halo: int = 32,
+    change_threshold: float = 0.02,
+    full_frame_ratio: float = 0.5,
+    batch_size: int = 8,
+    compare_full: bool = False
+):
+    """
+    帧流分割（时间复用）：把 896×896 模型输入划分为 tile 网格，与每个 tile 上次推理时的参考帧比较，
+    仅对变化量超过 change_threshold 的 tile（带 halo 上下文）重新推理，其余 tile 复用上一帧的概率图；
+    变化 tile 占比超过 full_frame_ratio 时直接整帧推理。
+
+    逐帧生成指标字典，processed_px 为本帧实际送入模型的像素数（tile 按含 halo 的 (tile_size + 2 * halo)² 计）；
+    compare_full=True 时额外做整帧推理，计算复用掩膜与逐帧全量推理的偏差（仅用于评估）。
+    """
+    h, w = INPUT_SIZE
+    if h % tile_size or w % tile_size:
+        raise ValueError(f"tile_size 必须整除输入尺寸 {INPUT_SIZE}")
+    if (tile_size + 2 * halo) % 16:
+        raise ValueError("tile_size + 2 * halo 必须为 16 的倍数")
+
+    model = load_backend(backend, checkpoint_path)
+    gh, gw = h // tile_size, w // tile_size
+    reference = None
+    prob = None
+
+    for idx, frame in iter_frames(source):
+        cur = preprocess_image(frame)
+
+        if reference is None:
+            changed = np.ones((gh, gw), dtype=bool)
+        else:
+            changed = _tile_change(reference, cur, tile_size) > change_threshold
+
+        n_changed = int(changed.sum())
+        full_frame = prob is None or n_changed > full_frame_ratio * gh * gw
+        if full_frame:
+            prob = predict_probabilities(model, cur.unsqueeze(0))[0]
+            reference = cur.clone()
+            n_changed = gh * gw
+        elif n_changed:
+            padded = F.pad(cur.unsqueeze(0), (halo, halo, halo, halo), mode="reflect")[0]
+            coords = list(zip(*np.nonzero(changed)))
+            for start in range(0, len(coords), batch_size):
+                chunk = coords[start:start + batch_size]
+                crops = torch.stack([
+                    padded[:, r * tile_size:r * tile_size + tile_size + 2 * halo, c * tile_size:c * tile_size + tile_size + 2 * halo]
+                    for r, c in chunk
+                ])
+                tile_probs = predict_probabilities(model, crops)
+                for (r, c), tp in zip(chunk, tile_probs):
+                    ys, xs = slice(r * tile_size, (r + 1) * tile_size), slice(c * tile_size, (c + 1) * tile_size)
+                    prob[ys, xs] = tp[halo:halo + tile_size, halo:halo + tile_size]
+                    reference[:, ys, xs] = cur[:, ys, xs]
+
+        mask = prob > MASK_THRESHOLD
+        metrics = {
+            "frame": idx,
+            "recomputed_tiles": n_changed,
+            "total_tiles": gh * gw,
+            "processed_px": h * w if full_frame else n_changed * (tile_size + 2 * halo) ** 2,
+            "frame_px": h * w,
+            "full_frame": full_frame,
+            "crack_area_px": int(mask.sum()),
+            "crack_ratio": round(float(mask.mean()), 6)
+        }
+        if compare_full:
+            ref_mask = predict_probabilities(model, cur.unsqueeze(0))[0] > MASK_THRESHOLD
+            union = np.logical_or(mask, ref_mask).sum()
+            metrics["iou_vs_full"] = round(float(np.logical_and(mask, ref_mask).sum() / union), 4) if union else 1.0
+            metrics["pixel_mismatch"] = round(float(np.mean(mask != ref_mask)), 6)
+        yield metrics, mask
+
+
+@tool(name="segment_crack_video")
+def segment_crack_video(
+    source: str,
+    checkpoint_path: str = "checkpoints/unet_best.pth",
+    backend: str = "torch",
+    output_dir: str = "outputs/video",
+    save_masks: bool = False,
+    change_threshold: float = 0.02,
+    compare_full: bool = False
+) -> dict:
+    """
+    视频 / 帧序列分割工具：逐帧指标以 JSONL 流式写入 <output_dir>/<name>_metrics.jsonl，
+    可选保存每帧掩膜；返回节省的计算量（相对逐帧整帧推理的像素数，tile 含 halo）及（compare_full 时）与逐帧全量推理的偏差。
+    """
+    try:
+        name = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+        os.makedirs(output_dir, exist_ok=True)
+        metrics_path = os.path.join(output_dir, f"{name}_metrics.jsonl")
+        mask_dir = os.path.join(output_dir, f"{name}_masks")
+        if save_masks:
+            os.makedirs(mask_dir, exist_ok=True)
+
+        n_frames = processed = total = 0
+        ious, mismatches = [], []
+        with open(metrics_path, "w", encoding="utf-8") as f:
+            for metrics, mask in segment_frame_stream(
+                source, checkpoint_path, backend, change_threshold=change_threshold, compare_full=compare_full
+            ):
+                if save_masks:
+                    cv2.imwrite(os.path.join(mask_dir, f"{metrics['frame']:06d}.png"), mask.astype(np.uint8) * 255)
+                f.write(json.dumps(metrics, ensure_ascii=False) + "\n")
+                f.flush()
+                n_frames += 1
+                processed += metrics["processed_px"]
+                total += metrics["frame_px"]
+                if compare_full:
+                    ious.append(metrics["iou_vs_full"])
+                    mismatches.append(metrics["pixel_mismatch"])
+
+        if n_frames == 0:
+            raise ValueError(f"未读取到任何帧: {source}")
+
+        report = {
+            "frames": n_frames,
+            "metrics_path": metrics_path,
+            # 按实际推理像素（含 halo 重叠）计，而非 tile 个数
+            "compute_saved": round(1 - processed / total, 4),
+        }
+        if save_masks:
+            report["mask_dir"] = mask_dir
+        if compare_full:
+            report["mean_iou_vs_full"] = round(float(np.mean(ious)), 4)
+            report["mean_pixel_mismatch"] = round(float(np.mean(mismatches)), 6)
+
+        return {
+            "status": "success",
+            "summary": f"视频分割完成：{n_frames} 帧，节省 {report['compute_saved']:.1%} 的推理像素（含 halo）",
+            "outputs": report,
+            "error": None
+        }
+
+    except Exception as e:
+        print("[ERROR] segment_crack_video 异常:", str(e))
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "summary": "视频分割失败",
+            "outputs": None,
+            "error": str(e)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频 / 帧序列裂缝分割（时间复用）")
+    parser.add_argument("source", help="视频文件或帧图像目录")
+    parser.add_argument("--checkpoint", default="checkpoints/unet_best.pth")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--change-threshold", type=float, default=0.02)
+    parser.add_argument("--save-masks", action="store_true")
+    parser.add_argument("--compare-full", action="store_true", help="同时逐帧全量推理以评估偏差（更慢）")
+    args = parser.parse_args()
+
+    result = segment_crack_video(
+        args.source, args.checkpoint, args.backend,
+        save_masks=args.save_masks, change_threshold=args.change_threshold, compare_full=args.compare_full
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
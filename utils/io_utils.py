@@ -37,3 +37,41 @@ def append_to_csv(csv_path: str, image_name: str, values: dict) -> str:
 
     df_combined.to_csv(csv_path, index=False)
     return csv_path
+
+
+def replace_image_rows(csv_path: str, image_name: str, rows: list) -> str:
+    """
+    写入一张图像的多行结果（如逐实例指标）：先删除该图像已有的全部行再追加。
+    """
+    df_new = pd.DataFrame([{"Image": image_name, **r} for r in rows], columns=None if rows else ["Image"])
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+
+    if os.path.exists(csv_path):
+        df_existing = pd.read_csv(csv_path)
+        df_existing = df_existing[df_existing["Image"] != image_name]
+        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
+    else:
+        df_combined = df_new
+
+    df_combined.to_csv(csv_path, index=False)
+    return csv_path
+
+
+def upsert_rows(csv_path: str, df_new: pd.DataFrame) -> str:
+    """
+    一次性写入多张图像的结果（每张一行，含 Image 列）：已有同名图像的行被覆盖，字段不一致时自动补全。
+    批量量化只在最后调用一次，避免逐图重写 CSV。
+    """
+    os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+
+    if os.path.exists(csv_path):
+        df_existing = pd.read_csv(csv_path)
+        df_existing = df_existing[~df_existing["Image"].isin(df_new["Image"])]
+        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
+        columns = ["Image"] + [col for col in df_combined.columns if col != "Image"]
+        df_combined = df_combined[columns]
+    else:
+        df_combined = df_new
+
+    df_combined.to_csv(csv_path, index=False)
+    return csv_path
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+
+def _file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def mask_digest(mask_path: str) -> str:
+    """掩膜文件内容哈希：像素指标缓存（MemoryController.save_pixel_metrics）的键。"""
+    return _file_digest(mask_path)
+
+
+class MaskCache:
+    """
+    内容寻址的掩膜缓存：键 = sha256(图像字节, checkpoint 摘要, 输入尺寸, 阈值, 推理模式)。
+    源图、权重或阈值任一变化都会得到新键，因此不会复用过期掩膜；
+    不同文件名的相同图像会命中同一条缓存。
+
+    目录结构：
+        <cache_dir>/manifest.json   键 → {file, size, created, last_access, source}
+        <cache_dir>/<key>.png       缓存的 0/255 掩膜
+    超过 max_bytes 时按最近访问时间（LRU）淘汰。
+    """
+
+    def __init__(self, cache_dir: str = "outputs/mask_cache", max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # checkpoint 摘要按 (路径, mtime, 大小) 记忆，避免每次重新哈希大文件
+        self._checkpoint_digests = {}
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception:
+            return {}
+        # 丢弃文件已不存在的条目
+        return {k: v for k, v in manifest.items() if (self.cache_dir / v["file"]).exists()}
+
+    def _save_manifest(self):
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def checkpoint_digest(self, checkpoint_path: str) -> str:
+        if not os.path.exists(checkpoint_path):
+            return f"missing:{checkpoint_path}"
+        st = os.stat(checkpoint_path)
+        sig = (os.path.abspath(checkpoint_path), st.st_mtime_ns, st.st_size)
+        if sig not in self._checkpoint_digests:
+            self._checkpoint_digests[sig] = _file_digest(checkpoint_path)
+        return self._checkpoint_digests[sig]
+
+    def make_key(self, image_path: str, checkpoint_path: str, input_size, threshold: float, mode: str = "resize",
+                 checkpoint_digest: str = None) -> str:
+        """checkpoint_digest 给定时直接使用（如分割服务返回的模型摘要），不再哈希 checkpoint_path。"""
+        h = hashlib.sha256()
+        h.update(_file_digest(image_path).encode())
+        h.update((checkpoint_digest or self.checkpoint_digest(checkpoint_path)).encode())
+        h.update(json.dumps([list(input_size) if input_size else None, float(threshold), mode]).encode())
+        return h.hexdigest()
+
+    def get(self, key: str, dest_path: str = None) -> str | None:
+        """
+        命中时返回缓存掩膜路径；若给定 dest_path 则复制到该路径并返回 dest_path。
+        """
+        with self._lock:
+            entry = self.manifest.get(key)
+            cached = self.cache_dir / entry["file"] if entry else None
+            if entry is None or not cached.exists():
+                self.misses += 1
+                if entry is not None:
+                    del self.manifest[key]
+                    self._save_manifest()
+                return None
+            self.hits += 1
+            entry["last_access"] = time.time()
+            self._save_manifest()
+
+        if dest_path:
+            os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+            shutil.copyfile(cached, dest_path)
+            return dest_path
+        return str(cached)
+
+    def put(self, key: str, mask_path: str, source: str = "") -> str:
+        """
+        将已写好的掩膜文件加入缓存，并在超出容量时淘汰最久未访问的条目。
+        """
+        file_name = f"{key}.png"
+        cached = self.cache_dir / file_name
+        shutil.copyfile(mask_path, cached)
+        now = time.time()
+        with self._lock:
+            self.manifest[key] = {
+                "file": file_name,
+                "size": cached.stat().st_size,
+                "created": now,
+                "last_access": now,
+                "source": source
+            }
+            self._evict()
+            self._save_manifest()
+        return str(cached)
+
+    def _evict(self):
+        total = sum(e["size"] for e in self.manifest.values())
+        for key, entry in sorted(self.manifest.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                (self.cache_dir / entry["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del self.manifest[key]
+            self.evictions += 1
+
+    def report(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self.manifest),
+            "size_bytes": sum(e["size"] for e in self.manifest.values()),
+            "max_bytes": self.max_bytes
+        }
+
+
+_default_cache = None
+
+
+def get_mask_cache() -> MaskCache:
+    """返回进程内共享的默认掩膜缓存（outputs/mask_cache）。"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = MaskCache()
+    return _default_cache
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+
+PROB_FORMATS = {"uint8": ".npz", "float16": ".npy"}
+
+
+def prob_map_path(mask_path: str, fmt: str = "uint8") -> str:
+    """
+    概率图与掩膜同目录存放：outputs/masks/0_crack.png → outputs/masks/0_crack_prob.npz（或 .npy）
+    """
+    if fmt not in PROB_FORMATS:
+        raise ValueError(f"未知概率图格式: {fmt}")
+    base, _ = os.path.splitext(mask_path)
+    return f"{base}_prob{PROB_FORMATS[fmt]}"
+
+
+def save_prob_map(mask_path: str, prob: np.ndarray, fmt: str = "uint8") -> str:
+    """
+    紧凑保存 sigmoid 概率图：
+        uint8   → round(p * 255) 压缩存入 .npz（精度 1/255，体积最小）
+        float16 → 未压缩 .npy，可用 np.load(mmap_mode="r") 内存映射读取
+    """
+    path = prob_map_path(mask_path, fmt)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "uint8":
+        q = np.clip(np.rint(prob * 255.0), 0, 255).astype(np.uint8)
+        np.savez_compressed(path, prob=q)
+    else:
+        np.save(path, prob.astype(np.float16))
+    return path
+
+
+def load_prob_map(path: str, mmap: bool = False) -> np.ndarray:
+    """
+    读取概率图，返回 [0, 1] 范围的数组（uint8 格式会反量化为 float32）。
+    mmap=True 时 .npy 以只读内存映射方式打开，不整体读入内存。
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return data["prob"].astype(np.float32) / 255.0
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def threshold_prob_map(path: str, threshold: float) -> np.ndarray:
+    """
+    直接由概率图文件生成 0/1 掩膜；uint8 格式在量化域比较，避免反量化整张图。
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            q = data["prob"]
+        # q 为整数，q > t*255 等价于 q > floor(t*255)
+        cut = int(np.floor(threshold * 255.0))
+        if cut < 0:
+            return np.ones_like(q)
+        return (q > cut).astype(np.uint8)
+    return (load_prob_map(path, mmap=True) > threshold).astype(np.uint8)
@@ -1,42 +1,18 @@
 import numpy as np
 import os
 import cv2
-from crack_metrics.binarize import binarize
-from crack_metrics.skeleton import extract_skeleton_and_normals
-from scipy.spatial import cKDTree
+from crack_metrics.analysis import MaskAnalysis
 
-def visualize_max_width(image: np.ndarray) -> tuple[np.ndarray, float]:
+def visualize_max_width(image: np.ndarray, analysis: MaskAnalysis | None = None) -> tuple[np.ndarray, float]:
     """
     可视化最大宽度：在图像上画出最大宽度线段（红色线段）
+    可传入已有的 MaskAnalysis 以复用骨架与轮廓 KD 树。
     返回：
         - 带有最大宽度线段的图像
         - 最大宽度值（像素单位）
     """
-    binary = binarize(image)
-    _, skeleton_points, _ = extract_skeleton_and_normals(binary)
-
-    if len(skeleton_points) == 0:
-        return image.copy(), 0.0
-
-    # 提取轮廓点
-    contours, _ = cv2.findContours((binary * 255).astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-    if not contours:
-        return image.copy(), 0.0
-    contour_pts = np.vstack([c.reshape(-1, 2) for c in contours])
-    tree = cKDTree(contour_pts)
-
-    # 搜索骨架点到两侧边界点之间的最大宽度
-    max_dist = 0.0
-    best_pair = None
-    for pt in skeleton_points:
-        dists, idxs = tree.query([pt], k=2)
-        if len(idxs[0]) < 2:
-            continue
-        p1, p2 = contour_pts[idxs[0][0]], contour_pts[idxs[0][1]]
-        dist = np.linalg.norm(p1 - p2)
-        if dist > max_dist:
-            max_dist = dist
-            best_pair = (p1, p2)
+    analysis = analysis or MaskAnalysis(image)
+    best_pair = analysis.max_width_pair
 
     # 绘制最大宽度线段
     vis = image.copy()
@@ -47,7 +23,7 @@ def visualize_max_width(image: np.ndarray) -> tuple[np.ndarray, float]:
         cv2.circle(vis, p1, 3, (0, 255, 0), -1)
         cv2.circle(vis, p2, 3, (0, 255, 0), -1)
 
-    return vis, round(max_dist, 2)
+    return vis, analysis.max_width_px
 
 def draw_skeleton_overlay(image: np.ndarray, centers: np.ndarray, alpha: float = 0.6) -> np.ndarray:
     """
@@ -63,6 +39,36 @@ def draw_skeleton_overlay(image: np.ndarray, centers: np.ndarray, alpha: float =
     return cv2.addWeighted(image, 1 - alpha, output, alpha, 0)
 
 
+def draw_normal_arrows(
+    image: np.ndarray,
+    points: np.ndarray,
+    normals: np.ndarray,
+    length: float = 10,
+    color: tuple = (0, 255, 0),
+    tip_length: float = 0.3
+) -> np.ndarray:
+    """
+    批量绘制法向箭头（就地修改并返回 image）：箭杆与箭头各用一次 cv2.polylines，
+    箭头形状与 cv2.arrowedLine 相同（两侧各偏 45°，长度 tip_length × 箭杆）。零法向不绘制。
+    """
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 2)
+    keep = np.any(normals != 0, axis=1)
+    if not keep.any():
+        return image
+    start = np.asarray(points, dtype=np.float64)[keep]
+    tip = start + normals[keep] * length
+
+    back = np.arctan2(start[:, 1] - tip[:, 1], start[:, 0] - tip[:, 0])
+    tip_size = length * tip_length
+    legs = [tip + tip_size * np.stack([np.cos(back + a), np.sin(back + a)], axis=1) for a in (np.pi / 4, -np.pi / 4)]
+
+    shafts = np.round(np.stack([start, tip], axis=1)).astype(np.int32)
+    heads = np.round(np.stack([legs[0], tip, legs[1]], axis=1)).astype(np.int32)
+    cv2.polylines(image, shafts, False, color, 1)
+    cv2.polylines(image, heads, False, color, 1)
+    return image
+
+
 def save_visual(image: np.ndarray, save_path: str) -> str:
     """
     保存可视化图像到指定路径。